@@ -0,0 +1,44 @@
+import asyncio
+import os
+
+from pubsub import BROKER_SOCKET_PATH, BROKER_MESSAGE_LIMIT
+
+"""
+Local message broker for the connect service workers.
+Every line received from a worker is relayed to all connected workers, including the sender.
+"""
+workers = set()
+
+async def relay(line):
+    for writer in list(workers):
+        try:
+            writer.write(line)
+            await writer.drain()
+        except Exception:
+            workers.discard(writer)
+            writer.close()
+
+async def handle_worker(reader, writer):
+    workers.add(writer)
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            await relay(line)
+    except Exception as e:
+        print("Connect broker lost a worker: %s" % e)
+    finally:
+        workers.discard(writer)
+        writer.close()
+
+async def run_broker(socket_path):
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    server = await asyncio.start_unix_server(handle_worker, path=socket_path, limit=BROKER_MESSAGE_LIMIT)
+    print("Connect broker listening on %s" % socket_path)
+    async with server:
+        await server.serve_forever()
+
+if __name__ == '__main__':
+    asyncio.run(run_broker(BROKER_SOCKET_PATH))
\ No newline at end of file
@@ -2,10 +2,42 @@ from starlette.applications import Starlette
 from starlette.websockets import WebSocketDisconnect
 import uvicorn
 import os
+import json
 from response_utils import *
+from session_clients import SessionClient, broadcast
+from pubsub import get_pubsub, is_valid_session_id
 
 app = Starlette(debug=bool(os.environ.get('DEBUG', '')))
+# Websockets connected to this worker process, by session ID
 app.open_websockets = {}
+# Messages are published through the pub/sub backend, which delivers them to the websockets of every worker
+app.pubsub = get_pubsub()
+
+async def remove_client(session_id, client):
+  if session_id in app.open_websockets.keys() and client in app.open_websockets[session_id]:
+    app.open_websockets[session_id].remove(client)
+    if len(app.open_websockets[session_id]) == 0:
+      del app.open_websockets[session_id]
+  await client.close()
+
+# Deliver a published message to the open websockets of this worker
+async def deliver(session_id, text):
+  if session_id in app.open_websockets.keys():
+    clients = list(app.open_websockets[session_id])
+    # Send to all open websockets concurrently
+    failed_clients = await broadcast(clients, text)
+    for client in failed_clients:
+      await remove_client(session_id, client)
+    return len(clients) - len(failed_clients)
+  return 0
+
+@app.on_event('startup')
+async def start_pubsub():
+  await app.pubsub.start(deliver)
+
+@app.on_event('shutdown')
+async def stop_pubsub():
+  await app.pubsub.stop()
 
 @app.websocket_route('/global-session-connect')
 async def route_global_session_connect(websocket):
@@ -14,39 +46,44 @@ async def route_global_session_connect(websocket):
   # Store websocket connections in the global dict based on the connection ID
   if "session_id" in init_json.keys():
     session_id = init_json["session_id"]
-    if len(session_id) != 8:
+    if not is_valid_session_id(session_id):
       # Wrong format for session ID
       print("Received an incorrectly-formatted session ID")
       return
+    client = SessionClient(websocket)
     if session_id in app.open_websockets.keys():
+      # Note that the limit applies per worker process
       if len(app.open_websockets[session_id]) < 25:
-        app.open_websockets[session_id].append(websocket)
+        app.open_websockets[session_id].append(client)
       else:
         # Too many websockets open for this session
         print("Max number of websockets reached for session with ID %s" % session_id)
+        await client.close()
         return
     else:
-      app.open_websockets[session_id] = [ websocket ]
+      app.open_websockets[session_id] = [ client ]
 
     while True:
       try:
         # Keep the connections open by pretending to wait for json
         await websocket.receive_json()
       except WebSocketDisconnect:
-        app.open_websockets[session_id].remove(websocket)
-        if len(app.open_websockets[session_id]) == 0:
-          del app.open_websockets[session_id]
+        await remove_client(session_id, client)
         break
 
 @app.route('/global-session-post', methods=['POST'])
 async def route_global_session_post(request):
   req = await request.json()
-  session_id = req["session_id"]
+  session_id = req.get("session_id")
+  if not is_valid_session_id(session_id):
+    return response_json_error(app, { "message": "Incorrectly-formatted session ID." }, 400)
   data = req["data"]
-  if session_id in app.open_websockets.keys():
-    for open_ws in app.open_websockets[session_id]:
-      await open_ws.send_json(data)
-    return response_json(app, { "message": ("Sent data to %d open client websockets." % len(app.open_websockets[session_id])) })
+  # Serialize once for all websockets
+  num_sent = await app.pubsub.publish(session_id, json.dumps(data))
+  if num_sent is None:
+    return response_json(app, { "message": "Published data to the open client websockets." })
+  elif num_sent > 0:
+    return response_json(app, { "message": ("Sent data to %d open client websockets." % num_sent) })
   else:
     return response_json(app, { "message": "No open websockets for that session ID." })
 
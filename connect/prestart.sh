@@ -0,0 +1,3 @@
+#! /bin/bash
+echo "Starting the connect broker..."
+python /app/broker.py &
\ No newline at end of file
@@ -0,0 +1,111 @@
+import asyncio
+import os
+import re
+
+# Path of the Unix socket of the local broker shared by the worker processes
+BROKER_SOCKET_PATH = os.environ.get('EXPLOSIG_CONNECT_BROKER_SOCKET', '/tmp/explosig-connect.sock')
+# Maximum size in bytes of one published message
+BROKER_MESSAGE_LIMIT = 16 * 1024 * 1024
+# Seconds to wait before reconnecting to the broker
+BROKER_RECONNECT_DELAY = 1
+
+# Session IDs are the first 8 characters of a UUID
+SESSION_ID_RE = re.compile(r'^[0-9A-Za-z]{8}$')
+
+def is_valid_session_id(session_id):
+    return isinstance(session_id, str) and SESSION_ID_RE.match(session_id) != None
+
+# Messages are sent over the broker as single lines: "<session_id> <serialized data>\n".
+# Serialized JSON never contains a raw newline, and session IDs are validated so that they contain no spaces or newlines.
+def encode_message(session_id, text):
+    if not is_valid_session_id(session_id):
+        raise ValueError("Invalid session ID")
+    return ("%s %s\n" % (session_id, text)).encode('utf-8')
+
+# Raises ValueError for a malformed line
+def decode_message(line):
+    session_id, text = line.decode('utf-8').rstrip('\n').split(' ', 1)
+    if not is_valid_session_id(session_id):
+        raise ValueError("Invalid session ID")
+    return session_id, text
+
+"""
+Pub/sub backend delivering messages to the subscribers of this process only.
+Requires a single worker process.
+"""
+class InProcessPubSub():
+
+    async def start(self, deliver):
+        self.deliver = deliver
+
+    # Returns the number of websockets the message was delivered to
+    async def publish(self, session_id, text):
+        return await self.deliver(session_id, text)
+
+    async def stop(self):
+        pass
+
+"""
+Pub/sub backend relaying messages through a local broker (see broker.py) over a Unix socket,
+so that every worker process delivers each message to its own subscribers
+"""
+class UnixSocketPubSub():
+
+    def __init__(self, socket_path=BROKER_SOCKET_PATH):
+        self.socket_path = socket_path
+        self.writer = None
+        self.connected = asyncio.Event()
+        self.deliveries = set()
+
+    async def start(self, deliver):
+        self.deliver = deliver
+        self.listener = asyncio.ensure_future(self.listen())
+
+    async def listen(self):
+        while True:
+            try:
+                reader, self.writer = await asyncio.open_unix_connection(self.socket_path, limit=BROKER_MESSAGE_LIMIT)
+                self.connected.set()
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    try:
+                        session_id, text = decode_message(line)
+                    except ValueError:
+                        # Skip the malformed line, rather than dropping the connection
+                        print("Received a malformed message from the connect broker")
+                        continue
+                    # Deliver without waiting, so that a slow websocket does not hold up
+                    # the messages of other sessions, nor the broker and so the other workers.
+                    # Deliveries start in order, and each client's queue keeps them in order.
+                    delivery = asyncio.ensure_future(self.deliver(session_id, text))
+                    self.deliveries.add(delivery)
+                    delivery.add_done_callback(self.deliveries.discard)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print("Connection to the connect broker failed: %s" % e)
+            self.connected.clear()
+            self.writer = None
+            await asyncio.sleep(BROKER_RECONNECT_DELAY)
+
+    # Delivery happens asynchronously in every worker, so the number of websockets is unknown
+    async def publish(self, session_id, text):
+        await asyncio.wait_for(self.connected.wait(), BROKER_RECONNECT_DELAY * 5)
+        self.writer.write(encode_message(session_id, text))
+        await self.writer.drain()
+        return None
+
+    async def stop(self):
+        self.listener.cancel()
+        for delivery in list(self.deliveries):
+            delivery.cancel()
+        if self.writer is not None:
+            self.writer.close()
+
+def get_pubsub():
+    backend = os.environ.get('EXPLOSIG_CONNECT_PUBSUB', 'inprocess')
+    if backend == 'unix':
+        return UnixSocketPubSub()
+    return InProcessPubSub()
\ No newline at end of file
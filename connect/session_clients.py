@@ -0,0 +1,53 @@
+import asyncio
+
+# Maximum number of messages waiting to be sent to one websocket
+CLIENT_QUEUE_SIZE = 32
+# Seconds to wait for a slow websocket before dropping it
+CLIENT_SEND_TIMEOUT = 5
+
+"""
+Websocket connection with a bounded queue of outgoing messages,
+sent in order by a writer task so that one slow client does not delay the others
+"""
+class SessionClient():
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        self.failed = False
+        self.writer = asyncio.ensure_future(self.write_messages())
+
+    async def write_messages(self):
+        try:
+            while True:
+                text = await self.queue.get()
+                await asyncio.wait_for(self.websocket.send_text(text), CLIENT_SEND_TIMEOUT)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # The websocket is dead or too slow, it will be dropped on the next broadcast
+            self.failed = True
+
+    # Returns False if the client failed and should be dropped
+    async def send(self, text):
+        if self.failed:
+            return False
+        try:
+            # Backpressure: wait while the queue is full, up to the timeout
+            await asyncio.wait_for(self.queue.put(text), CLIENT_SEND_TIMEOUT)
+            return True
+        except asyncio.TimeoutError:
+            self.failed = True
+            return False
+
+    async def close(self):
+        self.writer.cancel()
+        try:
+            await self.websocket.close()
+        except Exception:
+            pass
+
+# Send an already-serialized message to all clients concurrently, returning the clients which failed
+async def broadcast(clients, text):
+    results = await asyncio.gather(*[client.send(text) for client in clients])
+    return [client for client, success in zip(clients, results) if not success]
\ No newline at end of file
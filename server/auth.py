@@ -2,8 +2,19 @@ import os
 import uuid
 from argon2 import PasswordHasher
 from db import connect
+from caching import LRUCache
 from datetime import datetime, timedelta
 
+# Tokens expire 7 days after they are created
+TOKEN_EXPIRY = timedelta(days=7)
+# Validated tokens are cached for at most this many seconds,
+# which bounds how long a logout on another worker takes to be noticed
+TOKEN_CACHE_TTL = 300
+TOKEN_CACHE_MAX_ENTRIES = 1024
+
+# Maps validated tokens to their creation time
+token_cache = LRUCache(TOKEN_CACHE_MAX_ENTRIES)
+
 class NotAuthenticated(Exception):
     def __init__(self, message):
         Exception.__init__(self)
@@ -16,15 +27,17 @@ def is_protected():
 
 def login(password):
     if is_protected():
-        table, conn = connect('auth')
         # Try to verify the password
         try:
             ph = PasswordHasher()
             ph.verify(os.environ['EXPLOSIG_PASSWORD_HASH'], password)
             # Password is correct, generate token, insert into database
             token = str(uuid.uuid4())
-            ins = table.insert().values(token=token, created=datetime.now())
-            conn.execute(ins)
+            created = datetime.now()
+            with connect('auth') as (table, conn):
+                ins = table.insert().values(token=token, created=created)
+                conn.execute(ins)
+            cache_token(token, created)
             # Success
             return { "token": token }
         except:
@@ -32,31 +45,46 @@ def login(password):
             raise NotAuthenticated('Authentication failed. Please try again.')
 
 
+def cache_token(token, created):
+    # Never keep a token in the cache past its expiry
+    ttl = min(TOKEN_CACHE_TTL, (created + TOKEN_EXPIRY - datetime.now()).total_seconds())
+    if ttl > 0:
+        token_cache.set(token, created, ttl=ttl)
+
 def check_token(req):
     if is_protected():
         try:
             token = req['token']
-            table, conn = connect('auth')
-            # Look up the token in the database
-            sel = table.select().where(table.c.token == token)
-            res = conn.execute(sel)
-            row = res.fetchone()
-            if row != None:
-                # If a row for the token was found, check when it was created
-                if (datetime.now() - row['created']) < timedelta(days=7):
-                    # If less than 7 days ago, succeed
-                    return True
-                else:
-                    # If more than 7 days ago, delete the token, allow to fail
-                    sel = table.delete().where(table.c.token == token)
-                    conn.execute(sel)
+            # Check the cache of recently validated tokens first
+            found, created = token_cache.get(token)
+            if found and (datetime.now() - created) < TOKEN_EXPIRY:
+                return True
+            with connect('auth') as (table, conn):
+                # Look up the token in the database
+                sel = table.select().where(table.c.token == token)
+                res = conn.execute(sel)
+                row = res.fetchone()
+                if row != None:
+                    # If a row for the token was found, check when it was created
+                    if (datetime.now() - row['created']) < TOKEN_EXPIRY:
+                        # If less than 7 days ago, succeed
+                        cache_token(token, row['created'])
+                        return True
+                    else:
+                        # If more than 7 days ago, delete the token, allow to fail
+                        sel = table.delete().where(table.c.token == token)
+                        conn.execute(sel)
         except:
             pass
         raise NotAuthenticated('Authentication failed. Please try again.')
 
 def logout(token):
     if is_protected():
-        table, conn = connect('auth')
-        # If a logout was requested, proceed to delete the token
-        sel = table.delete().where(table.c.token == token)
-        conn.execute(sel)
\ No newline at end of file
+        token_cache.delete(token)
+        with connect('auth') as (table, conn):
+            # If a logout was requested, proceed to delete the token
+            sel = table.delete().where(table.c.token == token)
+            conn.execute(sel)
+
+def get_token_cache_stats():
+    return token_cache.get_stats()
\ No newline at end of file
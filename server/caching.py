@@ -0,0 +1,123 @@
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+import pandas as pd
+from functools import wraps
+
+from datasets import get_data_version
+
+RESULT_CACHE_MAX_ENTRIES = 128
+RESULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+"""
+Bounded least-recently-used cache, safe to share between threads
+"""
+class LRUCache():
+
+    # An optional max_bytes limits the total of the sizes given to set()
+    def __init__(self, max_entries, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.num_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    # Returns a (found, value) tuple so that None can be cached
+    def get(self, key):
+        with self.lock:
+            try:
+                value, expires, size = self.entries[key]
+            except KeyError:
+                self.misses += 1
+                return (False, None)
+            if expires != None and expires <= time.monotonic():
+                self.remove_entry(key)
+                self.misses += 1
+                return (False, None)
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return (True, value)
+
+    # An optional time-to-live in seconds can be set per entry,
+    # and an approximate size in bytes when the cache has a max_bytes limit
+    def set(self, key, value, ttl=None, size=0):
+        expires = (time.monotonic() + ttl) if ttl != None else None
+        with self.lock:
+            if self.max_bytes != None and size > self.max_bytes:
+                # Would evict everything else and still not fit
+                self.remove_entry(key)
+                return
+            self.remove_entry(key)
+            self.entries[key] = (value, expires, size)
+            self.num_bytes += size
+            while len(self.entries) > self.max_entries or (self.max_bytes != None and self.num_bytes > self.max_bytes):
+                self.remove_entry(next(iter(self.entries)))
+
+    def delete(self, key):
+        with self.lock:
+            self.remove_entry(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.num_bytes = 0
+
+    # Must be called with the lock held
+    def remove_entry(self, key):
+        entry = self.entries.pop(key, None)
+        if entry != None:
+            self.num_bytes -= entry[2]
+
+    def get_stats(self):
+        with self.lock:
+            requests = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": self.num_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / requests if requests > 0 else 0.0)
+            }
+
+"""
+Cache of computed results shared by the plot_* and scale_* functions
+"""
+result_cache = LRUCache(RESULT_CACHE_MAX_ENTRIES, max_bytes=RESULT_CACHE_MAX_BYTES)
+
+# Approximate size in bytes of a computed result: DataFrames (including their string columns),
+# or tuples and lists of them, e.g. a DataFrame with its scale
+def get_result_size(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(get_result_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(get_result_size(item) for item in value.values())
+    return sys.getsizeof(value)
+
+# Normalize arguments (lists, dicts) so that equivalent requests map to the same key.
+# List order is kept since it determines the order of the output.
+# The data version is included, so that results computed from replaced data are no longer used.
+def make_key(name, *args, **kwargs):
+    return json.dumps([name, get_data_version(), args, kwargs], sort_keys=True, default=str)
+
+# Decorator for memoizing a compute function in the result cache.
+# The cached value is shared between callers, so callers must not mutate it.
+def cached_result(name):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_key(name, *args, **kwargs)
+            found, value = result_cache.get(key)
+            if not found:
+                value = func(*args, **kwargs)
+                result_cache.set(key, value, size=get_result_size(value))
+            return value
+        return wrapper
+    return decorator
@@ -0,0 +1,36 @@
+import json
+import struct
+import numpy as np
+
+# Media type of the columnar binary format for numeric matrices, requested using the Accept header
+COLUMNAR_MEDIA_TYPE = 'application/vnd.explosig.columnar'
+
+"""
+Columnar binary format:
+a little-endian uint32 header length, followed by a JSON header
+{"columns", "index", "index_name", "dtype", "shape"}, padded with spaces
+so that the data starts at a multiple of 8 bytes, followed by the values
+as a row-major little-endian float64 array.
+Clients can read the data without copying, e.g. with new Float64Array(buffer, offset, rows * cols)
+"""
+def encode_columnar(df):
+    header = json.dumps({
+        "columns": [str(col) for col in df.columns.values],
+        "index": [str(row) for row in df.index.values],
+        "index_name": df.index.name,
+        "dtype": "float64",
+        "shape": list(df.shape)
+    }, separators=(',', ':')).encode('utf-8')
+    header += b' ' * (-(4 + len(header)) % 8)
+    data = np.ascontiguousarray(df.values, dtype='<f8')
+    return struct.pack('<I', len(header)) + header + data.tobytes()
+
+def decode_columnar(body):
+    header_len = struct.unpack('<I', body[:4])[0]
+    header = json.loads(body[4:4 + header_len].decode('utf-8'))
+    data = np.frombuffer(body, dtype='<f8', offset=4 + header_len).reshape(header["shape"])
+    return header, data
+
+# Compute a plot_* function's DataFrame and encode it, for running in the thread pool
+def compute_columnar(func, *args, **kwargs):
+    return encode_columnar(func(*args, return_df=True, **kwargs))
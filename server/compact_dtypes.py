@@ -0,0 +1,67 @@
+import os
+import numpy as np
+import pandas as pd
+
+"""
+Storage dtypes for counts, signatures and exposures.
+
+By default these are kept as float64, so responses are exact.
+With EXPLOSIG_COMPACT_DTYPES set, counts are stored as uint32 and signatures and exposures as float32,
+roughly halving their memory, and values are upcast to float64 only inside the solver.
+
+Precision checks:
+- uint32 counts are lossless: a counts frame is only converted if every value is a non-negative integer
+  no larger than the uint32 maximum, and is kept as it is otherwise.
+- float32 signatures and exposures have a relative rounding error of at most 2^-24 (about 6e-8) per value,
+  i.e. about 7 significant digits. check_float_precision reports the largest relative error of a conversion,
+  and scripts/check_compact_dtypes.py runs it over all loaded data.
+"""
+COMPACT_DTYPES = bool(os.environ.get('EXPLOSIG_COMPACT_DTYPES', ''))
+
+COUNTS_DTYPE = np.uint32
+FLOAT_DTYPE = (np.float32 if COMPACT_DTYPES else np.float64)
+# Largest relative error expected from storing a float64 value as float32
+FLOAT32_MAX_RELATIVE_ERROR = 2.0 ** -24
+
+def can_store_as_counts(values):
+    return (values.size == 0) or (
+        np.isfinite(values).all()
+        and (values >= 0).all()
+        and (values <= np.iinfo(COUNTS_DTYPE).max).all()
+        and (np.mod(values, 1) == 0).all()
+    )
+
+# Store a counts frame as uint32 if compact dtypes are enabled and it holds integer counts
+def compact_counts_df(counts_df):
+    if COMPACT_DTYPES:
+        values = counts_df.values
+        if values.dtype != COUNTS_DTYPE and can_store_as_counts(values.astype(np.float64)):
+            return pd.DataFrame(
+                data=np.ascontiguousarray(values, dtype=COUNTS_DTYPE),
+                index=counts_df.index,
+                columns=counts_df.columns
+            )
+    return counts_df
+
+# Store a frame of probabilities or exposures with the float storage dtype, as a single block
+def compact_float_df(df):
+    if df.shape[1] > 0 and any(dtype != FLOAT_DTYPE for dtype in df.dtypes):
+        return pd.DataFrame(
+            data=np.ascontiguousarray(df.values, dtype=FLOAT_DTYPE),
+            index=df.index,
+            columns=df.columns
+        )
+    return df
+
+# Upcast an array to contiguous float64, for the solver and other arithmetic
+def as_float64_array(values):
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+# Largest relative error between an array and its compact version, ignoring zeros in the original
+def check_float_precision(original, compact):
+    original = as_float64_array(original)
+    compact = as_float64_array(compact)
+    nonzero = (original != 0)
+    if not nonzero.any():
+        return 0.0
+    return float(np.max(np.abs(compact[nonzero] - original[nonzero]) / np.abs(original[nonzero])))
@@ -0,0 +1,46 @@
+import gzip
+import zlib
+
+from http_cache import accepts_encoding
+
+# Brotli is optional, responses fall back to gzip without it
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Responses smaller than this are sent uncompressed, since compression would barely reduce them
+COMPRESSION_MIN_SIZE = 1024
+# Levels for responses compressed per request, favoring speed
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# Levels for payloads compressed once, favoring size
+PRECOMPRESSED_GZIP_LEVEL = 9
+PRECOMPRESSED_BROTLI_QUALITY = 11
+
+def get_supported_encodings():
+    return (['br'] if brotli is not None else []) + ['gzip']
+
+# Choose the best content encoding accepted by the client, or None
+def choose_encoding(request):
+    for encoding in get_supported_encodings():
+        if accepts_encoding(request, encoding):
+            return encoding
+    return None
+
+def compress(body, encoding, precompressed=False):
+    if encoding == 'br':
+        return brotli.compress(body, quality=(PRECOMPRESSED_BROTLI_QUALITY if precompressed else BROTLI_QUALITY))
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=(PRECOMPRESSED_GZIP_LEVEL if precompressed else GZIP_LEVEL))
+    return body
+
+# Compress a stream of chunks into a single gzip stream,
+# flushing after each chunk so that the client can decode it right away
+def gzip_stream(chunks):
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        body = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if len(body) > 0:
+            yield body
+    yield compressor.flush()
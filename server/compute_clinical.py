@@ -0,0 +1,123 @@
+import pandas as pd
+import numpy as np
+
+from web_constants import *
+from project_data import ProjectData, get_selected_project_data
+from caching import cached_result
+from helpers import pd_concat_rows
+from datasets import datasets
+
+# Read in meta file, on first use
+def load_meta_clinical():
+    meta_clinical_df = pd.read_csv(META_CLINICAL_FILE, sep='\t')
+    meta_clinical_df = meta_clinical_df.loc[~meta_clinical_df[META_COL_CLINICAL_COL].isin([ICD_O_3_SITE_DESC, ICD_O_3_HISTOLOGY_DESC, SURVIVAL_DAYS_TO_DEATH, SURVIVAL_DAYS_TO_LAST_FOLLOWUP])]
+    return meta_clinical_df
+
+datasets.register('meta_clinical', load_meta_clinical)
+
+def get_meta_clinical_df():
+    return datasets.get('meta_clinical')
+
+def append_icd_desc(row, code_col, desc_col):
+    if row[desc_col] != 'nan':
+        return ("%s (%s)" % (row[code_col], row[desc_col]))
+    else:
+        return row[code_col]
+
+def get_clinical_variables():
+    return list(get_meta_clinical_df()[META_COL_CLINICAL_COL].unique())
+
+def get_clinical_variable_scale_types():
+    return get_meta_clinical_df().drop_duplicates(subset=[META_COL_CLINICAL_COL])[[META_COL_CLINICAL_COL, META_COL_CLINICAL_SCALE_TYPE]].to_dict('records')
+
+def clinical_var_infer_extent(clinical_var, meta_clinical_df):
+    return (meta_clinical_df.loc[(meta_clinical_df[META_COL_CLINICAL_COL] == clinical_var) & \
+            (meta_clinical_df[META_COL_CLINICAL_EXTENT] == 'infer')].shape[0] > 0)
+
+def clinical_var_is_continuous(clinical_var, meta_clinical_df):
+    return (meta_clinical_df.loc[(meta_clinical_df[META_COL_CLINICAL_COL] == clinical_var) & \
+            (meta_clinical_df[META_COL_CLINICAL_SCALE_TYPE] == 'continuous')].shape[0] > 0)
+
+def clear_list_of_nan(l):
+    return list(set(l) - set(['nan']))
+
+def compute_clinical(projects):
+    clinical_df, clinical_scale = compute_clinical_and_scale(projects)
+    return clinical_df.copy()
+
+# The clinical data frame and the scale of each clinical variable are computed and cached together,
+# so that the plot and scale requests for the same projects only load the clinical files once
+@cached_result('compute_clinical')
+def compute_clinical_and_scale(projects):
+    meta_clinical_df = get_meta_clinical_df()
+    clinical_vars = get_clinical_variables()
+    project_data = get_selected_project_data(projects)
+
+    proj_clinical_dfs = []
+    for proj in project_data:
+        samples = proj.get_samples_list()
+        if proj.has_clinical_df():
+            proj_clinical_df = proj.get_clinical_df()
+        else:
+            proj_clinical_df = pd.DataFrame(index=samples, data=[], columns=[])
+        proj_clinical_dfs.append(proj_clinical_df)
+    clinical_df = pd_concat_rows(proj_clinical_dfs, columns=clinical_vars + [ICD_O_3_SITE_DESC, ICD_O_3_HISTOLOGY_DESC])
+
+    # Try to convert columns to float if continuous-valued variables
+    for clinical_var in clinical_vars:
+        if clinical_var_is_continuous(clinical_var, meta_clinical_df):
+            try:
+                clinical_df[clinical_var] = clinical_df[clinical_var].astype(float)
+            except:
+                pass
+        else:
+            clinical_df[clinical_var] = clinical_df[clinical_var].fillna(value='nan')
+    
+    # "special" variable behavior
+    if ICD_O_3_SITE_CODE in clinical_vars:
+        clinical_df[ICD_O_3_SITE_CODE] = clinical_df.apply(
+            lambda row: append_icd_desc(row, ICD_O_3_SITE_CODE, ICD_O_3_SITE_DESC), 
+            axis='columns'
+        )
+    if ICD_O_3_HISTOLOGY_CODE in clinical_vars:
+        clinical_df[ICD_O_3_HISTOLOGY_CODE] = clinical_df.apply(
+            lambda row: append_icd_desc(row, ICD_O_3_HISTOLOGY_CODE, ICD_O_3_HISTOLOGY_DESC), 
+            axis='columns'
+        )
+    
+    if SURVIVAL_DAYS_TO_DEATH in clinical_vars:
+        clinical_df[SURVIVAL_DAYS_TO_DEATH] = clinical_df[SURVIVAL_DAYS_TO_DEATH].clip(lower=0.0)
+    if SURVIVAL_DAYS_TO_LAST_FOLLOWUP in clinical_vars:
+        clinical_df[SURVIVAL_DAYS_TO_LAST_FOLLOWUP] = clinical_df[SURVIVAL_DAYS_TO_LAST_FOLLOWUP].clip(lower=0.0)
+    
+    clinical_df.index = clinical_df.index.rename("sample_id")
+    clinical_df = clinical_df[clinical_vars]
+
+    return clinical_df, get_clinical_scale(clinical_df)
+
+def get_clinical_scale(clinical_df):
+    result = {}
+    meta_clinical_df = get_meta_clinical_df()
+    for clinical_var in get_clinical_variables():
+        if clinical_var_infer_extent(clinical_var, meta_clinical_df):
+            if clinical_var_is_continuous(clinical_var, meta_clinical_df):
+                # infer and continuous
+                result[clinical_var] = [clinical_df[clinical_var].min(), clinical_df[clinical_var].max()]
+                # If NaN values, just use 0 and 1
+                if pd.isna(result[clinical_var][0]) and pd.isna(result[clinical_var][1]):
+                    result[clinical_var][0] = 0
+                    result[clinical_var][1] = 1
+            else:
+                # infer and categorical
+                result[clinical_var] = sorted(clear_list_of_nan(list(clinical_df[clinical_var].unique())))
+        else:
+            clinical_values = meta_clinical_df.loc[meta_clinical_df[META_COL_CLINICAL_COL] == clinical_var][META_COL_CLINICAL_VALUE]
+            if clinical_var_is_continuous(clinical_var, meta_clinical_df):
+                # provided values and continuous
+                clinical_values = clinical_values.astype(float)
+                result[clinical_var] = [clinical_values.min(), clinical_values.max()]
+            else:
+                # provided values and categorical
+                result[clinical_var] = list(clinical_values.unique())
+    
+    return result
\ No newline at end of file
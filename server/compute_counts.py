@@ -4,6 +4,9 @@ import numpy as np
 from web_constants import *
 from signatures import Signatures, get_signatures_by_mut_type
 from project_data import ProjectData, get_selected_project_data
+from caching import cached_result
+from helpers import pd_concat_rows
+from sample_registry import sample_registry, restore_sample_ids
 
 
 def compute_counts(chosen_sigs, projects, mut_type, single_sample_id=None, normalize=False):
@@ -11,7 +14,7 @@ def compute_counts(chosen_sigs, projects, mut_type, single_sample_id=None, norma
     signatures = get_signatures_by_mut_type({mut_type: chosen_sigs})[mut_type]
     project_data = get_selected_project_data(projects)
 
-    counts_df = pd.DataFrame(index=[], data=[], columns=signatures.get_contexts())
+    proj_counts_dfs = []
 
     for proj in project_data:
         proj_id = proj.get_proj_id()
@@ -23,18 +26,68 @@ def compute_counts(chosen_sigs, projects, mut_type, single_sample_id=None, norma
             else:
                 continue
         
-        proj_counts_df = pd.DataFrame(index=samples, columns=[])
-        proj_counts_df = proj_counts_df.join(proj.get_counts_df(mut_type), how='outer')
+        # Join on sample keys rather than sample IDs
+        proj_counts_df = pd.DataFrame(index=sample_registry.get_keys(samples), columns=[])
+        proj_counts_df = proj_counts_df.join(proj.get_counts_df_by_key(mut_type), how='outer')
         proj_counts_df = proj_counts_df.fillna(value=0)
         proj_counts_df = proj_counts_df[signatures.get_contexts()]
+        proj_counts_df = restore_sample_ids(proj_counts_df)
 
         if single_sample_id != None and single_sample_id in samples:
             proj_counts_df = proj_counts_df.loc[[single_sample_id]]
 
-        counts_df = counts_df.append(proj_counts_df)
+        proj_counts_dfs.append(proj_counts_df)
+
+    counts_df = pd_concat_rows(proj_counts_dfs, columns=signatures.get_contexts())
         
     if normalize:
         counts_totals_series = counts_df.sum(axis='columns')
         counts_df = counts_df.divide(counts_totals_series, axis='index')
 
-    return counts_df[signatures.get_contexts()]
\ No newline at end of file
+    return counts_df[signatures.get_contexts()]
+
+# Total counts per mutation type for each sample, computed and cached together with their scale,
+# so that the plot and scale requests for the same projects only load the counts once
+@cached_result('compute_counts_by_mut_type')
+def compute_counts_by_mut_type_and_scale(projects, single_sample_id=None):
+    proj_counts_dfs = []
+
+    if single_sample_id != None: # single sample request
+      assert(len(projects) == 1)
+    
+    project_data = get_selected_project_data(projects)
+    for proj in project_data:
+        proj_id = proj.get_proj_id()
+
+        if single_sample_id != None: # single sample request
+            samples = [single_sample_id]
+        else:
+            samples = proj.get_samples_list()
+
+        # The counts are loaded first, so that the samples of the project are registered
+        # before the requested samples are looked up
+        counts_dfs = [(mut_type, proj.get_counts_df_by_key(mut_type)) for mut_type in MUT_TYPES]
+
+        # Join on sample keys rather than sample IDs
+        proj_counts_df = pd.DataFrame(index=sample_registry.get_keys(samples), columns=[])
+
+        for mut_type, counts_df in counts_dfs:
+            counts_df = counts_df.sum(axis=1).to_frame().rename(columns={0:mut_type})
+            proj_counts_df = proj_counts_df.join(counts_df, how='outer')
+            proj_counts_df = proj_counts_df.fillna(value=0)
+        
+        proj_counts_df = restore_sample_ids(proj_counts_df, name="sample_id")
+        proj_counts_dfs.append(proj_counts_df)
+
+    if len(proj_counts_dfs) > 0:
+        counts_df = pd.concat(proj_counts_dfs)
+    else:
+        counts_df = pd.DataFrame(index=pd.Index([], name="sample_id"), columns=MUT_TYPES)
+
+    counts_max = counts_df.max().max()
+    counts_sum_max = counts_df.sum(axis=1).max()
+    counts_scale = {
+        "max": (counts_max if pd.notnull(counts_max) else 0),
+        "sum_max": (counts_sum_max if pd.notnull(counts_sum_max) else 0)
+    }
+    return counts_df, counts_scale
\ No newline at end of file
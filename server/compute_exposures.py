@@ -6,13 +6,31 @@ from signatures import Signatures, get_signatures_by_mut_type
 from project_data import ProjectData, get_selected_project_data
 
 from compute_counts import compute_counts
+from caching import cached_result
+from helpers import pd_concat_rows
+from compact_dtypes import compact_float_df
+
+def get_exposures_scale(exps_df):
+    exps_max = exps_df.max().max()
+    exps_sum_max = exps_df.sum(axis=1).max()
+    return {
+        "max": (exps_max if pd.notnull(exps_max) else 0.0),
+        "sum_max": (exps_sum_max if pd.notnull(exps_sum_max) else 0.0)
+    }
 
 def compute_exposures(chosen_sigs, projects, mut_type, single_sample_id=None, normalize=False, tricounts_method=None):
+    exps_df, exps_scale = compute_exposures_and_scale(chosen_sigs, projects, mut_type, single_sample_id=single_sample_id, normalize=normalize, tricounts_method=tricounts_method)
+    return exps_df.copy()
+
+# Exposures and their scale are computed and cached together,
+# so that the plot and scale requests for the same exposures only solve the QP once
+@cached_result('compute_exposures')
+def compute_exposures_and_scale(chosen_sigs, projects, mut_type, single_sample_id=None, normalize=False, tricounts_method=None):
 
     signatures = get_signatures_by_mut_type({mut_type: chosen_sigs}, tricounts_method=None)[mut_type]
     project_data = get_selected_project_data(projects)
 
-    exps_df = pd.DataFrame(index=[], data=[], columns=signatures.get_chosen_names())
+    proj_exps_dfs = []
 
     for proj in project_data:
         # Check if need to get signatures based on each project's sequencing type before computing exposures
@@ -32,8 +50,10 @@ def compute_exposures(chosen_sigs, projects, mut_type, single_sample_id=None, no
             if not normalize:
                 proj_exps_df = proj_exps_df.apply(lambda row: row * proj_counts_df.loc[row.name, :].sum(), axis=1)
         
-            exps_df = exps_df.append(proj_exps_df)
+            proj_exps_dfs.append(proj_exps_df)
     
+    exps_df = pd_concat_rows(proj_exps_dfs, columns=signatures.get_chosen_names())
     exps_df = exps_df.fillna(value=0)
+    exps_df = compact_float_df(exps_df)
     
-    return exps_df
\ No newline at end of file
+    return exps_df, get_exposures_scale(exps_df)
\ No newline at end of file
@@ -7,6 +7,7 @@ from project_data import ProjectData, get_selected_project_data
 
 from compute_counts import compute_counts
 from compute_exposures import compute_exposures
+from compact_dtypes import as_float64_array
 
 def compute_reconstruction(chosen_sigs, projects, mut_type, single_sample_id=None, normalize=False, tricounts_method=None):
     
@@ -15,7 +16,8 @@ def compute_reconstruction(chosen_sigs, projects, mut_type, single_sample_id=Non
     counts_df = compute_counts(chosen_sigs, projects, mut_type, single_sample_id=single_sample_id, normalize=normalize)
     exps_df = compute_exposures(chosen_sigs, projects, mut_type, single_sample_id=single_sample_id, normalize=normalize, tricounts_method=tricounts_method)
 
-    reconstruction_array = np.dot(exps_df.values, signatures.get_2d_array())
+    # Upcast in case exposures and signatures are stored with compact dtypes
+    reconstruction_array = np.dot(as_float64_array(exps_df.values), as_float64_array(signatures.get_2d_array()))
     reconstruction_df = pd.DataFrame(index=list(counts_df.index.values), columns=signatures.get_contexts(), data=reconstruction_array)
     reconstruction_df = reconstruction_df[list(counts_df.columns.values)]
     
@@ -0,0 +1,115 @@
+import json
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+from web_constants import *
+
+"""
+Data plane of immutable matrices (the counts of each project), written once by scripts/build_data_plane.py
+as .npy files that every worker memory-maps read-only.
+The operating system keeps a single copy of the mapped pages for all workers,
+so memory no longer grows with the number of workers, and loading a matrix does not parse its file.
+The row and column labels are stored next to each matrix as JSON.
+"""
+DATA_PLANE_DIR = os.path.join(OBJ_DIR, DATA_PLANE_DIRNAME)
+
+def get_source_paths(s3_key):
+    filepath = os.path.join(OBJ_DIR, s3_key)
+    return [filepath, filepath[:-3] + "parquet"]
+
+def get_matrix_paths(s3_key):
+    base_path = os.path.join(DATA_PLANE_DIR, os.path.splitext(s3_key)[0])
+    return (base_path + ".npy", base_path + ".json")
+
+# Modification time of the newest source file (tsv or parquet) for a key
+def get_source_mtime(s3_key):
+    mtimes = [os.path.getmtime(path) for path in get_source_paths(s3_key) if os.path.isfile(path)]
+    return max(mtimes) if len(mtimes) > 0 else None
+
+def write_atomic(path, write_func):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        write_func(f)
+    os.replace(tmp_path, path)
+
+# Write a matrix to the data plane, keeping the dtype of its values
+def write_matrix(s3_key, df):
+    values_path, labels_path = get_matrix_paths(s3_key)
+    os.makedirs(os.path.dirname(values_path), exist_ok=True)
+    values = np.ascontiguousarray(df.values)
+    labels = {
+        "index": [str(row) for row in df.index.values],
+        "index_name": df.index.name,
+        "columns": [str(col) for col in df.columns.values]
+    }
+    # Labels are written last, since a matrix is only used once both of its files exist
+    write_atomic(values_path, lambda f: np.save(f, values))
+    write_atomic(labels_path, lambda f: f.write(json.dumps(labels).encode('utf-8')))
+
+"""
+Matrices mapped by this process, by key, with the signature of their files when they were mapped.
+A matrix is mapped again when its files or its source files change, e.g. when the data is reloaded.
+Misses are not cached, since the data plane may be built after the server starts:
+a key without a matrix is checked again on its next load, and only recorded for the stats.
+"""
+mapped_matrices = {}
+unbuilt_matrices = set()
+mapped_matrices_lock = threading.Lock()
+
+# Modification times and sizes of the matrix files and the source files of a key
+def get_matrix_signature(s3_key):
+    signature = []
+    for path in list(get_matrix_paths(s3_key)) + get_source_paths(s3_key):
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime, stat.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+def map_matrix(s3_key):
+    values_path, labels_path = get_matrix_paths(s3_key)
+    if not (os.path.isfile(values_path) and os.path.isfile(labels_path)):
+        return None
+    # A matrix older than its source file is stale, so the source file is parsed instead
+    source_mtime = get_source_mtime(s3_key)
+    if source_mtime != None and os.path.getmtime(labels_path) < source_mtime:
+        return None
+    with open(labels_path) as f:
+        labels = json.load(f)
+    values = np.load(values_path, mmap_mode='r')
+    index = pd.Index(np.array(labels["index"], dtype=object), name=labels["index_name"])
+    columns = pd.Index(labels["columns"])
+    return (values, index, columns)
+
+# Load a matrix from the data plane as a DataFrame over the read-only mapping,
+# or None if it has not been built (or is stale), in which case the source file should be parsed.
+# Each call returns a new DataFrame, so callers may replace its index, but must not modify its values in place.
+def load_matrix(s3_key):
+    signature = get_matrix_signature(s3_key)
+    with mapped_matrices_lock:
+        mapped = mapped_matrices.get(s3_key)
+        if mapped != None and mapped[0] == signature:
+            matrix = mapped[1]
+        else:
+            matrix = map_matrix(s3_key)
+            if matrix is None:
+                mapped_matrices.pop(s3_key, None)
+                unbuilt_matrices.add(s3_key)
+            else:
+                mapped_matrices[s3_key] = (signature, matrix)
+                unbuilt_matrices.discard(s3_key)
+    if matrix is None:
+        return None
+    values, index, columns = matrix
+    return pd.DataFrame(data=values, index=index, columns=columns, copy=False)
+
+def get_data_plane_stats():
+    with mapped_matrices_lock:
+        return {
+            "matrices": len(mapped_matrices),
+            "unbuilt": len(unbuilt_matrices),
+            "mapped_bytes": sum(matrix[0].nbytes for signature, matrix in mapped_matrices.values())
+        }
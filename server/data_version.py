@@ -0,0 +1,48 @@
+import hashlib
+import os
+import string
+
+from web_constants import *
+
+# Metadata and computed aggregate files from which the datasets and precomputed payloads are built,
+# which together determine the data version of a snapshot.
+# The files referenced from within the metadata files are versioned by their paths.
+DATA_VERSION_FILES = [
+    META_DATA_FILE,
+    META_SIGS_FILE,
+    META_PATHWAYS_FILE,
+    META_FEATURED_FILE,
+    META_CLINICAL_FILE,
+    META_TRICOUNTS_FILE,
+    ONCOTREE_FILE,
+    SAMPLES_AGG_FILE,
+    PROJ_TO_SIGS_FILE
+]
+
+# Gene aggregate files, read on each request rather than loaded into a dataset,
+# and rewritten by scripts/compute_genes.py after the server has started.
+# They are versioned separately, for the ETags only, so that rewriting them does not reload the datasets.
+GENES_VERSION_FILES = [GENES_AGG_FILE.format(letter=letter) for letter in string.ascii_uppercase]
+
+def compute_data_version(filepaths=DATA_VERSION_FILES):
+    # Hash file contents rather than modification times,
+    # so that every worker and every server with the same data agrees on the version
+    data_hash = hashlib.sha1()
+    for filepath in filepaths:
+        data_hash.update(os.path.basename(filepath).encode('utf-8'))
+        try:
+            with open(filepath, 'rb') as f:
+                data_hash.update(hashlib.sha1(f.read()).digest())
+        except OSError:
+            data_hash.update(b'missing')
+    return data_hash.hexdigest()[:16]
+
+# Cheap check for changes to the files, before hashing their contents
+def get_data_files_mtimes(filepaths=DATA_VERSION_FILES):
+    mtimes = []
+    for filepath in filepaths:
+        try:
+            mtimes.append(os.path.getmtime(filepath))
+        except OSError:
+            mtimes.append(None)
+    return tuple(mtimes)
\ No newline at end of file
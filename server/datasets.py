@@ -0,0 +1,185 @@
+import logging
+import threading
+import time
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from data_version import compute_data_version, get_data_files_mtimes, GENES_VERSION_FILES
+from startup_snapshot import read_startup_snapshot, get_startup_snapshot_mtime
+
+# Log with the server's own startup messages
+logger = logging.getLogger('uvicorn.error')
+
+"""
+Datasets loaded from one version of the /obj metadata files,
+each loaded on first use rather than when its module is imported.
+Loading is safe to start from several threads at once: each dataset is loaded only once,
+while requests for other datasets do not wait for it.
+If a startup snapshot (see startup_snapshot.py) was built for this version, the datasets are all taken from it instead.
+"""
+class DataSnapshot():
+
+    def __init__(self, version):
+        self.version = version
+        self.datasets = {}
+        self.load_locks = {}
+        self.load_times = OrderedDict()
+        self.lock = threading.Lock()
+        # Modification time of the startup snapshot file when it was last read
+        self.startup_snapshot_mtime = None
+        self.from_startup_snapshot = False
+        # Sorted sample IDs of all projects, if known from the startup snapshot
+        self.sample_ids = None
+
+    # A missing or stale snapshot is read again once the file has been (re)written,
+    # e.g. if it is built after the server has started
+    def read_startup_snapshot(self):
+        if self.from_startup_snapshot:
+            return
+        mtime = get_startup_snapshot_mtime()
+        if mtime == None or mtime == self.startup_snapshot_mtime:
+            return
+        with self.lock:
+            if not self.from_startup_snapshot and mtime != self.startup_snapshot_mtime:
+                start = time.monotonic()
+                startup_snapshot = read_startup_snapshot(self.version)
+                if startup_snapshot != None:
+                    self.datasets.update(startup_snapshot["datasets"])
+                    self.sample_ids = startup_snapshot["sample_ids"]
+                    self.from_startup_snapshot = True
+                    self.load_times["startup_snapshot"] = time.monotonic() - start
+                    logger.info("Loaded startup snapshot (data version %s) in %.3f s" % (self.version, time.monotonic() - start))
+                self.startup_snapshot_mtime = mtime
+
+    def get(self, name, load_func):
+        try:
+            return self.datasets[name]
+        except KeyError:
+            pass
+        self.read_startup_snapshot()
+        with self.lock:
+            load_lock = self.load_locks.setdefault(name, threading.Lock())
+        with load_lock:
+            # Another thread may have loaded the dataset while this one waited
+            if name not in self.datasets:
+                start = time.monotonic()
+                dataset = load_func()
+                load_time = time.monotonic() - start
+                with self.lock:
+                    self.datasets[name] = dataset
+                    self.load_times[name] = load_time
+                logger.info("Loaded dataset %s (data version %s) in %.3f s" % (name, self.version, load_time))
+            return self.datasets[name]
+
+"""
+Registry of the datasets (metadata tables, signatures, tri-counts, the Oncotree).
+The current snapshot can be replaced by one built from changed /obj metadata files.
+Each request is pinned to the snapshot that was current when it started,
+so that requests in flight during a reload finish on the data they started with.
+"""
+class DatasetRegistry():
+
+    def __init__(self):
+        self.loaders = OrderedDict()
+        self.lock = threading.Lock()
+        self.reload_lock = threading.Lock()
+        self.data_files_mtimes = get_data_files_mtimes()
+        self.snapshot = DataSnapshot(compute_data_version())
+        self.pinned_snapshot = contextvars.ContextVar('pinned_snapshot', default=None)
+        self.reloads = 0
+        self.genes_files_mtimes = get_data_files_mtimes(GENES_VERSION_FILES)
+        self.genes_version = compute_data_version(GENES_VERSION_FILES)
+
+    def register(self, name, load_func):
+        with self.lock:
+            self.loaders[name] = load_func
+
+    def get_snapshot(self):
+        snapshot = self.pinned_snapshot.get()
+        return snapshot if snapshot != None else self.snapshot
+
+    def get(self, name):
+        return self.get_snapshot().get(name, self.loaders[name])
+
+    def is_loaded(self, name):
+        return name in self.get_snapshot().datasets
+
+    # Pin the current snapshot for the current context, e.g. a request,
+    # which the thread pool functions run for it share
+    @contextmanager
+    def pinned(self):
+        token = self.pinned_snapshot.set(self.snapshot)
+        try:
+            yield
+        finally:
+            self.pinned_snapshot.reset(token)
+
+    # Load every registered dataset, e.g. in the background after startup
+    def warm_up(self, snapshot=None):
+        snapshot = snapshot if snapshot != None else self.snapshot
+        start = time.monotonic()
+        # Pinned so that loaders using other datasets get them from the same snapshot
+        token = self.pinned_snapshot.set(snapshot)
+        try:
+            for name, load_func in list(self.loaders.items()):
+                snapshot.get(name, load_func)
+        finally:
+            self.pinned_snapshot.reset(token)
+        logger.info("Loaded all datasets (data version %s) in %.3f s" % (snapshot.version, time.monotonic() - start))
+
+    # If the metadata files have changed, load a new snapshot in full, then swap it in.
+    # Returns whether the snapshot was replaced. If loading fails, the current snapshot is kept.
+    def reload_if_changed(self):
+        with self.reload_lock:
+            data_files_mtimes = get_data_files_mtimes()
+            if data_files_mtimes == self.data_files_mtimes:
+                return False
+            version = compute_data_version()
+            replaced = (version != self.snapshot.version)
+            if replaced:
+                snapshot = DataSnapshot(version)
+                try:
+                    self.warm_up(snapshot)
+                except Exception:
+                    # e.g. files still being written, so try again at the next check
+                    logger.exception("Failed to load data version %s" % version)
+                    return False
+                with self.lock:
+                    self.snapshot = snapshot
+                    self.reloads += 1
+                logger.info("Reloaded data version %s" % version)
+            self.data_files_mtimes = data_files_mtimes
+            return replaced
+
+    # The gene aggregate files are not loaded into any dataset,
+    # so a change to them only updates the version which the ETags include
+    def update_genes_version(self):
+        with self.reload_lock:
+            genes_files_mtimes = get_data_files_mtimes(GENES_VERSION_FILES)
+            if genes_files_mtimes != self.genes_files_mtimes:
+                self.genes_version = compute_data_version(GENES_VERSION_FILES)
+                self.genes_files_mtimes = genes_files_mtimes
+
+    def get_stats(self):
+        snapshot = self.get_snapshot()
+        with snapshot.lock:
+            return {
+                "data_version": snapshot.version,
+                "reloads": self.reloads,
+                "loaded": len(snapshot.datasets),
+                "from_startup_snapshot": snapshot.from_startup_snapshot,
+                "registered": len(self.loaders),
+                "load_times_ms": dict((name, round(load_time * 1000, 1)) for name, load_time in snapshot.load_times.items())
+            }
+
+datasets = DatasetRegistry()
+
+# Version of the data of the snapshot the current request is pinned to,
+# which the ETags and cache keys include
+def get_data_version():
+    return datasets.get_snapshot().version
+
+# Version of the gene aggregate files, which only the ETags include
+def get_genes_version():
+    return datasets.genes_version
@@ -1,14 +1,53 @@
 import os
+import threading
+from contextlib import contextmanager
 from sqlalchemy import create_engine
 from sqlalchemy import MetaData, Table
 
-def connect(table_name):
-    engine = create_engine("mysql://{user}:{password}@db:3306/explosig".format(
-      user=os.environ['EXPLOSIG_DB_USER'],
-      password=os.environ['EXPLOSIG_DB_PASSWORD']
-    ))
-    conn = engine.connect()
-    metadata = MetaData(engine, reflect=True)
-    table = metadata.tables[table_name]
-    return table, conn
+# Bounds on the number of pooled connections per worker
+DB_POOL_SIZE = int(os.environ.get('EXPLOSIG_DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.environ.get('EXPLOSIG_DB_MAX_OVERFLOW', 10))
+# Recycle connections before MySQL's wait_timeout closes them on the server side
+DB_POOL_RECYCLE = 3600
+
+engine = None
+metadata = MetaData()
+tables = {}
+db_lock = threading.Lock()
+
+# The engine and its connection pool are created once per process, on first use
+def get_engine():
+    global engine
+    with db_lock:
+        if engine is None:
+            engine = create_engine(
+                "mysql://{user}:{password}@db:3306/explosig".format(
+                    user=os.environ['EXPLOSIG_DB_USER'],
+                    password=os.environ['EXPLOSIG_DB_PASSWORD']
+                ),
+                pool_size=DB_POOL_SIZE,
+                max_overflow=DB_MAX_OVERFLOW,
+                pool_recycle=DB_POOL_RECYCLE,
+                pool_pre_ping=True
+            )
+        return engine
 
+# Tables are reflected once and reused across requests
+def get_table(table_name):
+    try:
+        return tables[table_name]
+    except KeyError:
+        pass
+    db_engine = get_engine()
+    with db_lock:
+        if table_name not in tables:
+            tables[table_name] = Table(table_name, metadata, autoload=True, autoload_with=db_engine)
+        return tables[table_name]
+
+# Usage: `with connect('auth') as (table, conn):`
+# The connection is returned to the pool when the block exits
+@contextmanager
+def connect(table_name):
+    table = get_table(table_name)
+    with get_engine().connect() as conn:
+        yield table, conn
\ No newline at end of file
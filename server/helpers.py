@@ -7,6 +7,20 @@ def pd_as_file(df, index_val=True):
     df.to_csv(output, index=index_val)
     return output.getvalue()
 
+# Concatenate the rows of a list of DataFrames, with the given columns first (as when appending
+# each DataFrame to an empty DataFrame with these columns), copying all rows once at the end
+def pd_concat_rows(dfs, columns=[], ignore_index=False):
+    if len(dfs) == 0:
+        return pd.DataFrame(index=[], data=[], columns=columns)
+    df = pd.concat(dfs, ignore_index=ignore_index, sort=False)
+    extra_columns = [col for col in df.columns.values if col not in set(columns)]
+    return df.reindex(columns=(list(columns) + extra_columns))
+
+# Split a DataFrame into consecutive chunks of at most chunk_size rows
+def pd_iter_chunks(df, chunk_size=1000):
+    for start in range(0, df.shape[0], chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
 def pd_fetch_tsv(obj_dir, s3_key, **kwargs):
     filepath = os.path.join(obj_dir, s3_key)
     parquet_filepath = filepath[:-3] + "parquet"
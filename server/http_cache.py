@@ -0,0 +1,56 @@
+import hashlib
+
+from datasets import get_data_version, get_genes_version
+
+# Responses to GET requests may be cached by browsers and CDNs for this many seconds,
+# after which they are revalidated using the ETag
+CACHE_MAX_AGE = 300
+
+# The ETag changes whenever either the request or the underlying data changes
+def get_etag(request_key):
+    etag_hash = hashlib.sha1((get_data_version() + get_genes_version() + request_key).encode('utf-8'))
+    # Weak since the same data may be sent with different content encodings
+    return 'W/"%s"' % etag_hash.hexdigest()
+
+def strip_weak_prefix(etag):
+    return etag[2:] if etag.startswith('W/') else etag
+
+def etag_matches(request, etag):
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is None:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or strip_weak_prefix(candidate) == strip_weak_prefix(etag):
+            return True
+    return False
+
+def get_cache_control(request, is_protected):
+    if request.method == 'GET':
+        # Responses to protected servers must not be stored by shared caches
+        return '%s, max-age=%d' % (('private' if is_protected else 'public'), CACHE_MAX_AGE)
+    return 'no-cache'
+
+# Check whether a value is listed in an Accept-style header, and not with q=0
+def header_accepts(header_value, value):
+    for candidate in header_value.split(','):
+        params = candidate.strip().split(';')
+        if params[0].strip().lower() == value:
+            for param in params[1:]:
+                param = param.strip()
+                if param.startswith('q='):
+                    try:
+                        if float(param[2:]) == 0:
+                            return False
+                    except ValueError:
+                        return False
+            return True
+    return False
+
+# Check whether the client accepts a content encoding, e.g. gzip
+def accepts_encoding(request, encoding):
+    return header_accepts(request.headers.get('accept-encoding', ''), encoding)
+
+# Check whether the client explicitly accepts a media type, wildcards are not considered
+def accepts_media_type(request, media_type):
+    return header_accepts(request.headers.get('accept', ''), media_type)
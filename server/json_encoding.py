@@ -0,0 +1,60 @@
+import orjson
+import numpy as np
+import pandas as pd
+
+# NumPy arrays and scalars are serialized natively, NaN and infinity become null
+JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+# Media type of newline-delimited JSON, with one record per line, requested using the Accept header
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+
+# Equivalent to df.to_dict('records'), with a named index (e.g. sample_id) included as a column,
+# but converting whole columns at once rather than element by element
+def df_to_records(df):
+    if df.index.name != None:
+        df = df.reset_index()
+    columns = [str(col) for col in df.columns.values]
+    column_values = [column_to_list(df[col]) for col in df.columns.values]
+    return [dict(zip(columns, row)) for row in zip(*column_values)]
+
+# float32 values (see compact_dtypes) are kept as NumPy scalars so that orjson writes
+# only the digits float32 holds, rather than those of the equivalent Python float
+def column_to_list(series):
+    if series.dtype == np.float32:
+        return list(series.values)
+    return series.tolist()
+
+# Fallback for types which orjson does not serialize itself
+def encode_default(obj):
+    if isinstance(obj, pd.DataFrame):
+        return df_to_records(obj)
+    if isinstance(obj, pd.Series):
+        return obj.tolist()
+    if isinstance(obj, np.ndarray):
+        # Non-contiguous or object arrays
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError
+
+def encode_json(output):
+    return orjson.dumps(output, default=encode_default, option=JSON_OPTIONS)
+
+# Compute a plot_* or scale_* function's output and encode it, for running in the thread pool
+def compute_json(func, *args, **kwargs):
+    return encode_json(func(*args, **kwargs))
+
+# Encode a DataFrame (or list of records) as newline-delimited JSON
+def encode_ndjson(records):
+    if isinstance(records, pd.DataFrame):
+        records = df_to_records(records)
+    return b''.join(encode_json(record) + b'\n' for record in records)
+
+# Encode the chunks of an iter_* function lazily, one NDJSON chunk at a time
+def iter_ndjson(iter_func, *args, **kwargs):
+    for chunk in iter_func(*args, **kwargs):
+        body = encode_ndjson(chunk)
+        if len(body) > 0:
+            yield body
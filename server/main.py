@@ -1,12 +1,16 @@
 from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
 import uvicorn
+import asyncio
+import logging
 import os
+import json
 
 from jsonschema import validate
 from response_utils import *
 from web_constants import *
 
-from plot_data_listing import plot_data_listing
+from plot_data_listing import plot_data_listing, get_data_listing_payload
 
 from plot_clustering import plot_clustering
 
@@ -15,17 +19,17 @@ from scale_samples import scale_samples
 from plot_exposures import plot_exposures
 from scale_exposures import scale_exposures
 
-from plot_counts import plot_counts
+from plot_counts import plot_counts, iter_counts
 from scale_counts import scale_counts
 
 from plot_counts_by_category import plot_counts_by_category
 
-from plot_samples_meta import plot_samples_meta
+from plot_samples_meta import plot_samples_meta, iter_samples_meta
 
-from plot_gene_mut_track import plot_gene_mut_track, autocomplete_gene, plot_pathways_listing
-from plot_gene_exp_track import plot_gene_exp_track
-from plot_gene_cna_track import plot_gene_cna_track
-from plot_clinical import plot_clinical
+from plot_gene_mut_track import plot_gene_mut_track, iter_gene_mut_track, autocomplete_gene, plot_pathways_listing, get_pathways_listing_payload
+from plot_gene_exp_track import plot_gene_exp_track, iter_gene_exp_track
+from plot_gene_cna_track import plot_gene_cna_track, iter_gene_cna_track
+from plot_clinical import plot_clinical, iter_clinical
 from scale_clinical import scale_clinical
 from plot_survival import plot_survival
 
@@ -38,14 +42,45 @@ from scale_contexts import scale_contexts
 from plot_signature import plot_signature
 from plot_reconstruction_cosine_similarity import plot_reconstruction_cosine_similarity
 # Sharing
-from sharing_state import get_sharing_state, set_sharing_state, plot_featured_listing
-from sessions import session_get, session_start, session_connect, session_post
+from sharing_state import get_sharing_state, set_sharing_state, plot_featured_listing, get_featured_listing_payload, get_sharing_cache_stats
+from sessions import SessionError, session_get, session_start, session_patch, session_connect, session_post, close_connect_client, get_relay_stats, get_session_cache_stats
 
 # Authentication
-from auth import NotAuthenticated, login, logout, check_token
+from auth import NotAuthenticated, login, logout, check_token, is_protected, get_token_cache_stats
+
+from project_data import register_all_samples
+from sample_registry import UnknownSample, sample_registry
+from data_plane import get_data_plane_stats
+from datasets import datasets
+
+# Caching
+from caching import result_cache
+from single_flight import single_flight, make_request_key
+from http_cache import get_etag, etag_matches, get_cache_control, accepts_encoding, accepts_media_type
+from compression import COMPRESSION_MIN_SIZE, choose_encoding, compress, gzip_stream
+from columnar import COLUMNAR_MEDIA_TYPE, compute_columnar
+from json_encoding import NDJSON_MEDIA_TYPE, compute_json, iter_ndjson
 
 
 app = Starlette(debug=bool(os.environ.get('DEBUG', '')))
+logger = logging.getLogger('uvicorn.error')
+
+# Pin each request to the current data snapshot, so that a request in flight
+# when the data is reloaded finishes on the data it started with.
+# The lifespan scope is not pinned, since the warm-up and reload tasks started from it
+# would otherwise keep seeing the snapshot that was current at startup.
+class PinDataSnapshot():
+  def __init__(self, app):
+    self.app = app
+
+  async def __call__(self, scope, receive, send):
+    if scope["type"] not in ("http", "websocket"):
+      await self.app(scope, receive, send)
+      return
+    with datasets.pinned():
+      await self.app(scope, receive, send)
+
+app.add_middleware(PinDataSnapshot)
 
 """ 
 Authentication helpers 
@@ -54,13 +89,170 @@ Authentication helpers
 async def handle_not_authenticated(request, exc):
     return response_json_error(app, {"message": exc.message}, exc.status_code)
 
+@app.exception_handler(UnknownSample)
+async def handle_unknown_sample(request, exc):
+    return response_json_error(app, {"message": exc.message}, exc.status_code)
+
+async def get_req(request):
+  # Read-only routes also accept GET requests with the JSON body in the `q` query parameter,
+  # so that responses can be cached by browsers and CDNs.
+  # The token is only taken from the Authorization header, never from the URL,
+  # so that it does not end up in access logs, browser history or caches.
+  if request.method == 'GET':
+    req = json.loads(request.query_params.get('q', '{}'))
+    req.pop('token', None)
+    token = get_bearer_token(request)
+    if token != None:
+      req['token'] = token
+    return req
+  return await request.json()
+
+def get_bearer_token(request):
+  authorization = request.headers.get('authorization', '')
+  if authorization.startswith('Bearer '):
+    return authorization[len('Bearer '):].strip()
+  return None
+
 async def check_req(request, schema=None):
-  req = await request.json()
+  req = await get_req(request)
   check_token(req)
   if schema != None:
     validate(req, schema)
   return req
 
+"""
+Response helpers
+"""
+async def respond(request, req, func, *args, **kwargs):
+  return await respond_json(request, req, 'Accept-Encoding', func, *args, **kwargs)
+
+async def respond_json(request, req, vary, func, *args, **kwargs):
+  key = make_request_key(request.url.path, req)
+  etag = get_etag(key)
+  cache_control = get_cache_control(request, is_protected())
+  if etag_matches(request, etag):
+    return response_not_modified(app, etag, cache_control=cache_control, vary=vary)
+  # Identical concurrent requests share a single computation and its encoding
+  body = await single_flight.run(key, compute_json, func, *args, **kwargs)
+  body, encoding = await compress_body(request, body)
+  return response_bytes(app, body, 'application/json', encoding=encoding, etag=etag, cache_control=cache_control, vary=vary)
+
+# For large sample-level routes with an iter_* function yielding one DataFrame per project (or chunk of rows).
+# Clients may request newline-delimited JSON using the Accept header, which is streamed chunk by chunk
+# rather than building the whole response in memory.
+async def respond_streamable(request, req, func, iter_func, *args):
+  if not accepts_media_type(request, NDJSON_MEDIA_TYPE):
+    return await respond_json(request, req, 'Accept, Accept-Encoding', func, *args)
+  key = make_request_key(request.url.path, dict(req, accept=NDJSON_MEDIA_TYPE))
+  etag = get_etag(key)
+  cache_control = get_cache_control(request, is_protected())
+  if etag_matches(request, etag):
+    return response_not_modified(app, etag, cache_control=cache_control, vary='Accept, Accept-Encoding')
+  chunks = iter_ndjson(iter_func, *args)
+  encoding = 'gzip' if accepts_encoding(request, 'gzip') else None
+  if encoding != None:
+    chunks = gzip_stream(chunks)
+  return response_stream(app, iterate_in_threadpool(chunks), NDJSON_MEDIA_TYPE, encoding=encoding, etag=etag, cache_control=cache_control, vary='Accept, Accept-Encoding')
+
+# Compute (and compress) each chunk in the thread pool
+async def iterate_in_threadpool(iterator):
+  while True:
+    chunk = await run_in_threadpool(next, iterator, None)
+    if chunk is None:
+      return
+    yield chunk
+
+# For plot functions with a return_df option, which return one row per sample indexed by sample_id.
+# Clients may request the columnar binary format instead of JSON records using the Accept header.
+async def respond_matrix(request, req, func, *args, **kwargs):
+  media_type = COLUMNAR_MEDIA_TYPE if accepts_media_type(request, COLUMNAR_MEDIA_TYPE) else 'application/json'
+  key = make_request_key(request.url.path, dict(req, accept=media_type))
+  etag = get_etag(key)
+  cache_control = get_cache_control(request, is_protected())
+  if etag_matches(request, etag):
+    return response_not_modified(app, etag, cache_control=cache_control, vary='Accept, Accept-Encoding')
+  if media_type == COLUMNAR_MEDIA_TYPE:
+    body = await single_flight.run(key, compute_columnar, func, *args, **kwargs)
+  else:
+    # The DataFrame is encoded directly as JSON records, without building the records in the plot function
+    body = await single_flight.run(key, compute_json, func, *args, return_df=True, **kwargs)
+  body, encoding = await compress_body(request, body)
+  return response_bytes(app, body, media_type, encoding=encoding, etag=etag, cache_control=cache_control, vary='Accept, Accept-Encoding')
+
+# Compress in the thread pool, unless the body is too small to benefit
+async def compress_body(request, body):
+  encoding = choose_encoding(request) if len(body) >= COMPRESSION_MIN_SIZE else None
+  if encoding != None:
+    body = await run_in_threadpool(compress, body, encoding)
+  return body, encoding
+
+def respond_payload(request, payload):
+  cache_control = get_cache_control(request, is_protected())
+  if etag_matches(request, payload.etag):
+    return response_not_modified(app, payload.etag, cache_control=cache_control)
+  return response_payload(app, payload, encoding=choose_encoding(request), cache_control=cache_control)
+
+"""
+Startup
+"""
+# Datasets are loaded on first use, so the server accepts connections without loading any.
+# Unless EXPLOSIG_WARM_UP is set to '', they are then all loaded in the background,
+# while requests arriving first load the datasets they need themselves.
+WARM_UP = bool(os.environ.get('EXPLOSIG_WARM_UP', '1'))
+warm_up_future = None
+
+# Unless EXPLOSIG_RELOAD_INTERVAL is set to 0, the metadata files in /obj are checked
+# for changes this often (in seconds), and changed data is loaded in the background
+# then swapped in, without restarting the server
+RELOAD_INTERVAL = float(os.environ.get('EXPLOSIG_RELOAD_INTERVAL', '60'))
+watch_data_future = None
+
+def build_payloads():
+  # Build and compress the listings, since every client requests them on load
+  get_data_listing_payload()
+  get_pathways_listing_payload()
+  get_featured_listing_payload()
+
+def warm_up():
+  # Assign sample keys in sorted order, before most requests register samples
+  register_all_samples()
+  datasets.warm_up()
+  build_payloads()
+
+def reload_data():
+  if datasets.reload_if_changed():
+    build_payloads()
+  datasets.update_genes_version()
+
+async def watch_data():
+  while True:
+    await asyncio.sleep(RELOAD_INTERVAL)
+    try:
+      await run_in_threadpool(reload_data)
+    except Exception:
+      logger.exception("Failed to reload data")
+
+@app.on_event('startup')
+async def start_warm_up():
+  global warm_up_future
+  if WARM_UP:
+    warm_up_future = asyncio.ensure_future(run_in_threadpool(warm_up))
+
+@app.on_event('startup')
+async def start_watching_data():
+  global watch_data_future
+  if RELOAD_INTERVAL > 0:
+    watch_data_future = asyncio.ensure_future(watch_data())
+
+@app.on_event('shutdown')
+async def stop_watching_data():
+  if watch_data_future != None:
+    watch_data_future.cancel()
+
+@app.on_event('shutdown')
+async def close_clients():
+  await close_connect_client()
+
 """
 Reusable JSON schema
 """
@@ -80,24 +272,26 @@ signatures_schema = {
 """
 Data listing
 """
-@app.route('/data-listing', methods=['POST'])
+@app.route('/data-listing', methods=['GET', 'POST'])
 async def route_data_listing(request):
-  req = await check_req(request)
-  output = plot_data_listing()
-  return response_json(app, output)
+  await check_req(request)
+  # Built in the thread pool, since the first request may load the datasets and compress the payload,
+  # or wait for the warm-up to finish building it
+  payload = await run_in_threadpool(get_data_listing_payload)
+  return respond_payload(request, payload)
 
 # TODO: combine the below listing requests into the one data listing request
-@app.route('/pathways-listing', methods=['POST'])
+@app.route('/pathways-listing', methods=['GET', 'POST'])
 async def route_pathways_listing(request):
-  req = await check_req(request)
-  output = plot_pathways_listing()
-  return response_json(app, output)
+  await check_req(request)
+  payload = await run_in_threadpool(get_pathways_listing_payload)
+  return respond_payload(request, payload)
 
-@app.route('/featured-listing', methods=['POST'])
+@app.route('/featured-listing', methods=['GET', 'POST'])
 async def route_featured_listing(request):
-  req = await check_req(request)
-  output = plot_featured_listing()
-  return response_json(app, output)
+  await check_req(request)
+  payload = await run_in_threadpool(get_featured_listing_payload)
+  return respond_payload(request, payload)
 
 
 """
@@ -111,14 +305,13 @@ schema_signature = {
     "tricounts_method": {"type": "string"}
   }
 }
-@app.route('/plot-signature', methods=['POST'])
+@app.route('/plot-signature', methods=['GET', 'POST'])
 async def route_plot_signature(request):
   req = await check_req(request, schema=schema_signature)
 
   assert(req["mut_type"] in MUT_TYPES)
 
-  output = plot_signature(req["signature"], req["mut_type"], tricounts_method=req["tricounts_method"])
-  return response_json(app, output)
+  return await respond(request, req, plot_signature, req["signature"], req["mut_type"], tricounts_method=req["tricounts_method"])
 
 """
 Samples-by-project
@@ -129,12 +322,11 @@ schema_samples_meta = {
     "projects": projects_schema
   }
 }
-@app.route('/plot-samples-meta', methods=['POST'])
+@app.route('/plot-samples-meta', methods=['GET', 'POST'])
 async def route_plot_samples_meta(request):
   req = await check_req(request, schema=schema_counts)
 
-  output = plot_samples_meta(req["projects"])
-  return response_json(app, output)
+  return await respond_streamable(request, req, plot_samples_meta, iter_samples_meta, req["projects"])
 
 """
 Counts
@@ -145,12 +337,11 @@ schema_counts = {
     "projects": projects_schema
   }
 }
-@app.route('/plot-counts', methods=['POST'])
+@app.route('/plot-counts', methods=['GET', 'POST'])
 async def route_plot_counts(request):
   req = await check_req(request, schema=schema_counts)
 
-  output = plot_counts(req["projects"])
-  return response_json(app, output)
+  return await respond_streamable(request, req, plot_counts, iter_counts, req["projects"])
 
 schema_counts_by_category = {
   "type": "object",
@@ -159,12 +350,11 @@ schema_counts_by_category = {
     "mut_type": {"type": "string"}
   }
 }
-@app.route('/plot-counts-by-category', methods=['POST'])
+@app.route('/plot-counts-by-category', methods=['GET', 'POST'])
 async def route_plot_counts_by_category(request):
   req = await check_req(request, schema=schema_counts_by_category)
 
-  output = plot_counts_by_category(req["projects"], req["mut_type"])
-  return response_json(app, output)
+  return await respond_matrix(request, req, plot_counts_by_category, req["projects"], req["mut_type"])
 
 """
 Exposures
@@ -178,33 +368,30 @@ schema_exposures = {
     "tricounts_method": {"type": "string"}
   }
 }
-@app.route('/plot-exposures', methods=['POST'])
+@app.route('/plot-exposures', methods=['GET', 'POST'])
 async def route_plot_exposures(request):
   req = await check_req(request, schema=schema_exposures)
 
   assert(req["mut_type"] in MUT_TYPES)
 
-  output = plot_exposures(req["signatures"], req["projects"], req["mut_type"], tricounts_method=req["tricounts_method"])
-  return response_json(app, output)
+  return await respond_matrix(request, req, plot_exposures, req["signatures"], req["projects"], req["mut_type"], tricounts_method=req["tricounts_method"])
 
-@app.route('/plot-exposures-normalized', methods=['POST'])
+@app.route('/plot-exposures-normalized', methods=['GET', 'POST'])
 async def route_plot_exposures_normalized(request):
   req = await check_req(request, schema=schema_exposures)
 
   assert(req["mut_type"] in MUT_TYPES)
 
-  output = plot_exposures(req["signatures"], req["projects"], req["mut_type"], normalize=True, tricounts_method=req["tricounts_method"])
-  return response_json(app, output)
+  return await respond_matrix(request, req, plot_exposures, req["signatures"], req["projects"], req["mut_type"], normalize=True, tricounts_method=req["tricounts_method"])
 
 
-@app.route('/scale-exposures-normalized', methods=['POST'])
+@app.route('/scale-exposures-normalized', methods=['GET', 'POST'])
 async def route_scale_exposures_normalized(request):
   req = await check_req(request, schema=schema_exposures)
 
   assert(req["mut_type"] in MUT_TYPES)
 
-  output = scale_exposures(req["signatures"], req["projects"], req["mut_type"], exp_sum=False, exp_normalize=True, tricounts_method=req["tricounts_method"])
-  return response_json(app, output)
+  return await respond(request, req, scale_exposures, req["signatures"], req["projects"], req["mut_type"], exp_sum=False, exp_normalize=True, tricounts_method=req["tricounts_method"])
 
 schema_exposures_single_sample = {
   "type": "object",
@@ -216,63 +403,73 @@ schema_exposures_single_sample = {
     "tricounts_method": {"type": "string"}
   }
 }
-@app.route('/plot-exposures-single-sample', methods=['POST'])
+@app.route('/plot-exposures-single-sample', methods=['GET', 'POST'])
 async def route_plot_exposures_single_sample(request):
   req = await check_req(request, schema=schema_exposures_single_sample)
 
   assert(req["mut_type"] in MUT_TYPES)
 
-  output = plot_exposures(req["signatures"], req["projects"], req["mut_type"], single_sample_id=req["sample_id"], normalize=False, tricounts_method=req["tricounts_method"])
-  return response_json(app, output)
+  return await respond(request, req, plot_exposures, req["signatures"], req["projects"], req["mut_type"], single_sample_id=req["sample_id"], normalize=False, tricounts_method=req["tricounts_method"])
 
 
 """
 Reconstruction error
 """
-@app.route('/plot-counts-per-category-single-sample', methods=['POST'])
+@app.route('/plot-counts-per-category-single-sample', methods=['GET', 'POST'])
 async def route_plot_counts_per_category_single_sample(request):
   req = await check_req(request, schema=schema_exposures_single_sample)
 
   assert(req["mut_type"] in MUT_TYPES)
 
-  output = plot_counts_per_category(req["signatures"], req["projects"], req["mut_type"], single_sample_id=req["sample_id"], normalize=False)
-  return response_json(app, output)
+  return await respond(request, req, plot_counts_per_category, req["signatures"], req["projects"], req["mut_type"], single_sample_id=req["sample_id"], normalize=False)
+
+@app.route('/plot-reconstruction', methods=['GET', 'POST'])
+async def route_plot_reconstruction(request):
+  req = await check_req(request, schema=schema_exposures)
 
-@app.route('/plot-reconstruction-single-sample', methods=['POST'])
+  assert(req["mut_type"] in MUT_TYPES)
+
+  return await respond_matrix(request, req, plot_reconstruction, req["signatures"], req["projects"], req["mut_type"], normalize=False, tricounts_method=req["tricounts_method"])
+
+@app.route('/plot-reconstruction-error', methods=['GET', 'POST'])
+async def route_plot_reconstruction_error(request):
+  req = await check_req(request, schema=schema_exposures)
+
+  assert(req["mut_type"] in MUT_TYPES)
+
+  return await respond_matrix(request, req, plot_reconstruction_error, req["signatures"], req["projects"], req["mut_type"], normalize=False, tricounts_method=req["tricounts_method"])
+
+@app.route('/plot-reconstruction-single-sample', methods=['GET', 'POST'])
 async def route_plot_reconstruction_single_sample(request):
   req = await check_req(request, schema=schema_exposures_single_sample)
 
   assert(req["mut_type"] in MUT_TYPES)
 
-  output = plot_reconstruction(req["signatures"], req["projects"], req["mut_type"], single_sample_id=req["sample_id"], normalize=False, tricounts_method=req["tricounts_method"])
-  return response_json(app, output)
+  return await respond(request, req, plot_reconstruction, req["signatures"], req["projects"], req["mut_type"], single_sample_id=req["sample_id"], normalize=False, tricounts_method=req["tricounts_method"])
 
-@app.route('/plot-reconstruction-error-single-sample', methods=['POST'])
+@app.route('/plot-reconstruction-error-single-sample', methods=['GET', 'POST'])
 async def route_plot_reconstruction_error_single_sample(request):
   req = await check_req(request, schema=schema_exposures_single_sample)
 
   assert(req["mut_type"] in MUT_TYPES)
 
-  output = plot_reconstruction_error(req["signatures"], req["projects"], req["mut_type"], single_sample_id=req["sample_id"], normalize=False, tricounts_method=req["tricounts_method"])
-  return response_json(app, output)
+  return await respond(request, req, plot_reconstruction_error, req["signatures"], req["projects"], req["mut_type"], single_sample_id=req["sample_id"], normalize=False, tricounts_method=req["tricounts_method"])
 
-@app.route('/plot-reconstruction-cosine-similarity', methods=['POST'])
+@app.route('/plot-reconstruction-cosine-similarity', methods=['GET', 'POST'])
 async def route_plot_reconstruction_cosine_similarity(request):
   req = await check_req(request, schema=schema_exposures)
 
   assert(req["mut_type"] in MUT_TYPES)
 
-  output = plot_reconstruction_cosine_similarity(req["signatures"], req["projects"], req["mut_type"], tricounts_method=req["tricounts_method"])
-  return response_json(app, output)
+  return await respond(request, req, plot_reconstruction_cosine_similarity, req["signatures"], req["projects"], req["mut_type"], tricounts_method=req["tricounts_method"])
 
-@app.route('/plot-reconstruction-cosine-similarity-single-sample', methods=['POST'])
+@app.route('/plot-reconstruction-cosine-similarity-single-sample', methods=['GET', 'POST'])
 async def route_plot_reconstruction_cosine_similarity_single_sample(request):
   req = await check_req(request, schema=schema_exposures_single_sample)
 
   assert(req["mut_type"] in MUT_TYPES)
 
-  output = plot_reconstruction_cosine_similarity(req["signatures"], req["projects"], req["mut_type"], single_sample_id=req["sample_id"], tricounts_method=req["tricounts_method"])
-  return response_json(app, output)
+  return await respond(request, req, plot_reconstruction_cosine_similarity, req["signatures"], req["projects"], req["mut_type"], single_sample_id=req["sample_id"], tricounts_method=req["tricounts_method"])
 
 
 
@@ -283,14 +480,13 @@ schema_contexts = {
     "mut_type": {"type": "string"}
   }
 }
-@app.route('/scale-contexts', methods=['POST'])
+@app.route('/scale-contexts', methods=['GET', 'POST'])
 async def route_scale_contexts(request):
   req = await check_req(request, schema=schema_contexts)
 
   assert(req["mut_type"] in MUT_TYPES)
 
-  output = scale_contexts(req["mut_type"])
-  return response_json(app, output)
+  return await respond(request, req, scale_contexts, req["mut_type"])
 
 
 """
@@ -304,12 +500,11 @@ schema_clustering = {
     "tricounts_method": {"type": "string"}
   }
 }
-@app.route('/clustering', methods=['POST'])
+@app.route('/clustering', methods=['GET', 'POST'])
 async def route_clustering(request):
   req = await check_req(request, schema=schema_clustering)
 
-  output = plot_clustering(req["signatures"], req["projects"], tricounts_method=req["tricounts_method"])
-  return response_json(app, output)
+  return await respond(request, req, plot_clustering, req["signatures"], req["projects"], tricounts_method=req["tricounts_method"])
 
 
 """
@@ -322,26 +517,23 @@ schema_gene_event_track = {
     "projects": projects_schema
   }
 }
-@app.route('/plot-gene-mut-track', methods=['POST'])
+@app.route('/plot-gene-mut-track', methods=['GET', 'POST'])
 async def route_gene_mut_track(request):
   req = await check_req(request, schema=schema_gene_event_track)
 
-  output = plot_gene_mut_track(req["gene_id"], req["projects"])
-  return response_json(app, output)
+  return await respond_streamable(request, req, plot_gene_mut_track, iter_gene_mut_track, req["gene_id"], req["projects"])
 
-@app.route('/plot-gene-exp-track', methods=['POST'])
+@app.route('/plot-gene-exp-track', methods=['GET', 'POST'])
 async def route_gene_exp_track(request):
   req = await check_req(request, schema=schema_gene_event_track)
 
-  output = plot_gene_exp_track(req["gene_id"], req["projects"])
-  return response_json(app, output)
+  return await respond_streamable(request, req, plot_gene_exp_track, iter_gene_exp_track, req["gene_id"], req["projects"])
 
-@app.route('/plot-gene-cna-track', methods=['POST'])
+@app.route('/plot-gene-cna-track', methods=['GET', 'POST'])
 async def route_gene_cna_track(request):
   req = await check_req(request, schema=schema_gene_event_track)
 
-  output = plot_gene_cna_track(req["gene_id"], req["projects"])
-  return response_json(app, output) 
+  return await respond_streamable(request, req, plot_gene_cna_track, iter_gene_cna_track, req["gene_id"], req["projects"])
 
 
 """
@@ -354,12 +546,11 @@ schema_autocomplete_gene = {
     "gene_id_partial": {"type": "string"}
   }
 }
-@app.route('/autocomplete-gene', methods=['POST'])
+@app.route('/autocomplete-gene', methods=['GET', 'POST'])
 async def route_autocomplete_gene(request):
   req = await check_req(request, schema=schema_autocomplete_gene)
 
-  output = autocomplete_gene(req["gene_id_partial"], req["projects"])
-  return response_json(app, output)
+  return await respond(request, req, autocomplete_gene, req["gene_id_partial"], req["projects"])
 
 """
 Clinical Variable Tracks
@@ -370,19 +561,17 @@ schema_clinical = {
     "projects": projects_schema
   }
 }
-@app.route('/plot-clinical', methods=['POST'])
+@app.route('/plot-clinical', methods=['GET', 'POST'])
 async def route_plot_clinical(request):
   req = await check_req(request, schema=schema_clinical)
 
-  output = plot_clinical(req["projects"])
-  return response_json(app, output)
+  return await respond_streamable(request, req, plot_clinical, iter_clinical, req["projects"])
 
-@app.route('/scale-clinical', methods=['POST'])
+@app.route('/scale-clinical', methods=['GET', 'POST'])
 async def route_scale_clinical(request):
   req = await check_req(request, schema=schema_clinical)
 
-  output = scale_clinical(req["projects"])
-  return response_json(app, output)
+  return await respond(request, req, scale_clinical, req["projects"])
 
 schema_survival = {
   "type": "object",
@@ -390,12 +579,11 @@ schema_survival = {
     "projects": projects_schema
   }
 }
-@app.route('/plot-survival', methods=['POST'])
+@app.route('/plot-survival', methods=['GET', 'POST'])
 async def route_plot_survival(request):
   req = await check_req(request, schema=schema_survival)
 
-  output = plot_survival(req["projects"])
-  return response_json(app, output)
+  return await respond(request, req, plot_survival, req["projects"])
 
 """
 Samples listing
@@ -406,12 +594,11 @@ schema_samples = {
     "projects": projects_schema
   }
 }
-@app.route('/scale-samples', methods=['POST'])
+@app.route('/scale-samples', methods=['GET', 'POST'])
 async def route_scale_samples(request):
   req = await check_req(request, schema=schema_samples)
 
-  output = scale_samples(req["projects"])
-  return response_json(app, output)
+  return await respond(request, req, scale_samples, req["projects"])
 
 
 """
@@ -480,15 +667,40 @@ async def route_session_start(request):
 schema_session_get = {
   "type": "object",
   "properties": {
-    "session_id": {"type": "string"}
+    "session_id": {"type": "string"},
+    "version": {"type": "integer"}
   }
 }
 @app.route('/session-get', methods=['POST'])
 async def route_session_get(request):
   req = await check_req(request, schema=schema_session_get)
   try:
-    output = session_get(req['session_id'])
+    output = session_get(req['session_id'], version=req.get('version'))
     return response_json(app, output)
+  except SessionError as e:
+    return response_json_error(app, {"message": e.message}, e.status_code)
+  except:
+    return response_json_error(app, {"message": "An error has occurred."}, 500)
+
+schema_session_patch = {
+  "type": "object",
+  "properties": {
+    "session_id": {"type": "string"},
+    "version": {"type": "integer"},
+    "patch": {"type": "array"}
+  },
+  "required": ["session_id", "version", "patch"]
+}
+@app.route('/session-patch', methods=['POST'])
+async def route_session_patch(request):
+  req = await check_req(request, schema=schema_session_patch)
+  try:
+    output = session_patch(req['session_id'], req['version'], req['patch'])
+    # Broadcast only the delta to the other clients in the session
+    await session_post(req['session_id'], { 'version': output['version'], 'patch': req['patch'] })
+    return response_json(app, output)
+  except SessionError as e:
+    return response_json_error(app, {"message": e.message}, e.status_code)
   except:
     return response_json_error(app, {"message": "An error has occurred."}, 500)
 
@@ -541,6 +753,25 @@ async def route_logout(request):
   output = {'message': 'Logout successful.'}
   return response_json(app, output)
 
+"""
+Server statistics
+"""
+@app.route('/server-stats', methods=['POST'])
+async def route_server_stats(request):
+  await check_req(request)
+  output = {
+    'single_flight': single_flight.get_stats(),
+    'result_cache': result_cache.get_stats(),
+    'token_cache': get_token_cache_stats(),
+    'sharing_cache': get_sharing_cache_stats(),
+    'session_cache': get_session_cache_stats(),
+    'sample_registry': sample_registry.get_stats(),
+    'data_plane': get_data_plane_stats(),
+    'datasets': datasets.get_stats(),
+    'session_relay': get_relay_stats()
+  }
+  return response_json(app, output)
+
 
 if __name__ == '__main__':
     uvicorn.run(app, host='0.0.0.0', port=int(os.environ.get('PORT', 8100)))
\ No newline at end of file
@@ -1,5 +1,8 @@
 import json
 
+from web_constants import ONCOTREE_FILE
+from datasets import datasets
+
 class OncoNode():
 
     def __init__(self, node_json, parent):
@@ -9,52 +12,74 @@ class OncoNode():
         self.tissue = node_json['tissue']
         self.level = node_json['level']
         self.parent = parent
+
+        # Precompute the chain of ancestors (starting with this node, excluding the root)
+        # and the tissue node, since the parent is already constructed
+        if parent == None:
+            self.ancestors = []
+            self.tissue_node = None # only would happen for the head node
+        else:
+            self.ancestors = [self] + parent.ancestors
+            self.tissue_node = self if parent.code == "TISSUE" else parent.tissue_node
+
         self.children = []
         for child in node_json['children'].values():
             self.children.append(OncoNode(child, self))
-    
+
     # From a list of oncotree codes, go up the tree to find the closest ancestor to this node that is in the list
     # Used to match a specific project's oncotree code to the list of signature oncotree code mappings
     def find_closest_parent(self, code_list):
-        def find_closest_parent_aux(node):
-            if node == None:
-                return None
-            if node.parent == None:
-                return None
-            if node.code in code_list:
+        code_set = code_list if isinstance(code_list, (set, frozenset)) else set(code_list)
+        for node in self.ancestors:
+            if node.code in code_set:
                 return node
-            return find_closest_parent_aux(node.parent)
-        return find_closest_parent_aux(self)
+        return None
 
-    # From a child/leaf node, go up the tree to the tissue type node, 
+    # From a child/leaf node, go up the tree to the tissue type node,
     # which should be the one below the TISSUE root node
     def get_tissue_node(self):
-        def get_tissue_type_aux(node):
-            if node.parent == None:
-                return None # only would happen if you ask for tissue on the head node
-            if node.parent.code == "TISSUE":
-                return node
-            return get_tissue_type_aux(node.parent)
-        return get_tissue_type_aux(self)
+        return self.tissue_node
 
 
 class OncoTree():
 
     def __init__(self, tree_json):
         self.head = OncoNode(tree_json['TISSUE'], None)
-    
-    def find_node(self, code):
-        def find_node_aux(node):
-            if node == None:
-                return None
-            if node.code == code:
-                return node
+
+        # Index the nodes by code, keeping the first node in depth-first order for duplicate codes
+        self.nodes_by_code = {}
+        def index_node_aux(node):
+            self.nodes_by_code.setdefault(node.code, node)
             for child in node.children:
-                found = find_node_aux(child)
-                if found is not None:
-                    return found
-            return None
-        return find_node_aux(self.head)
-    
+                index_node_aux(child)
+        index_node_aux(self.head)
+
+    def find_node(self, code):
+        return self.nodes_by_code.get(code)
+
+    def get_tissue_node(self, code):
+        node = self.find_node(code)
+        if node is not None:
+            return node.get_tissue_node()
+        return None
+
+    # Find the closest ancestor of the node with the given code (including the node itself) with a code in the code set
+    def find_closest_parent(self, code, code_set):
+        node = self.find_node(code)
+        if node is not None:
+            return node.find_closest_parent(code_set)
+        return None
+
     def get_tissue_nodes(self):
-        return self.head.children
\ No newline at end of file
+        return self.head.children
+
+""" The Oncotree of ONCOTREE_FILE, loaded on first use and shared by the signatures and projects """
+def read_oncotree():
+    with open(ONCOTREE_FILE) as f:
+        tree_json = json.load(f)
+    return OncoTree(tree_json)
+
+datasets.register('oncotree', read_oncotree)
+
+def get_oncotree():
+    return datasets.get('oncotree')
\ No newline at end of file
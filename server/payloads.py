@@ -0,0 +1,40 @@
+import hashlib
+import threading
+from json_encoding import encode_json
+from compression import get_supported_encodings, compress
+from datasets import get_data_version
+
+"""
+Response payload which is serialized and compressed once, then served as raw bytes
+"""
+class PrecomputedPayload():
+
+    def __init__(self, output, data_version=None):
+        # Same serialization as response_json
+        self.body = encode_json(output)
+        self.compressed_bodies = dict((encoding, compress(self.body, encoding, precompressed=True)) for encoding in get_supported_encodings())
+        self.etag = 'W/"%s"' % hashlib.sha1(self.body).hexdigest()
+        self.data_version = data_version
+
+    def get_body(self, encoding=None):
+        if encoding != None:
+            return self.compressed_bodies[encoding]
+        return self.body
+
+"""
+Payloads of listings which only change with the data,
+built once per data version and kept serialized and compressed in memory
+"""
+precomputed_payloads = {}
+precomputed_payloads_lock = threading.Lock()
+
+def get_precomputed_payload(name, func):
+    data_version = get_data_version()
+    payload = precomputed_payloads.get(name)
+    if payload is None or payload.data_version != data_version:
+        with precomputed_payloads_lock:
+            payload = precomputed_payloads.get(name)
+            if payload is None or payload.data_version != data_version:
+                payload = PrecomputedPayload(func(), data_version=data_version)
+                precomputed_payloads[name] = payload
+    return payload
@@ -3,11 +3,13 @@ import numpy as np
 
 from web_constants import *
 from project_data import ProjectData, get_selected_project_data
+from sample_registry import sample_registry, restore_sample_ids
 
 # Regular counts matrix.
 # Names of counts functions are confusing because plot_counts just considers mutation type e.g. for a sample, SBS: 1, DBS: 3, INDEL: 2
-def plot_counts_by_category(projects, mut_type, single_sample_id=None):
+def plot_counts_by_category(projects, mut_type, single_sample_id=None, return_df=False):
     result = []
+    proj_counts_dfs = []
 
     if single_sample_id != None: # single sample request
       assert(len(projects) == 1)
@@ -21,17 +23,26 @@ def plot_counts_by_category(projects, mut_type, single_sample_id=None):
         else:
             samples = proj.get_samples_list()
 
-        proj_counts_df = pd.DataFrame(index=samples, columns=[])
-        
-        counts_df = proj.get_counts_df(mut_type)
+        # Loaded first, so that the samples of the project are registered before the requested samples are looked up
+        counts_df = proj.get_counts_df_by_key(mut_type)
+
+        # Join on sample keys rather than sample IDs
+        proj_counts_df = pd.DataFrame(index=sample_registry.get_keys(samples), columns=[])
 
         proj_counts_df = proj_counts_df.join(counts_df, how='outer')
         proj_counts_df = proj_counts_df.fillna(value=0)
         
-        proj_counts_df.index.rename("sample_id", inplace=True)
+        proj_counts_df = restore_sample_ids(proj_counts_df, name="sample_id")
+
+        if return_df:
+            proj_counts_dfs.append(proj_counts_df)
+            continue
         
         proj_counts_df = proj_counts_df.reset_index()
-        proj_result = proj_counts_df.to_dict('records')
-        result = (result + proj_result)
+        result.extend(proj_counts_df.to_dict('records'))
+
+    if return_df:
+        counts_df = pd.concat(proj_counts_dfs, sort=False) if len(proj_counts_dfs) > 0 else pd.DataFrame()
+        return counts_df.fillna(value=0)
 
     return result
\ No newline at end of file
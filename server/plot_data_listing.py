@@ -4,7 +4,7 @@ from signatures import Signatures
 from project_data import ProjectData, get_all_project_data_as_json, get_all_tissue_types_as_json
 from sig_data import SigData, get_all_sig_data_as_json, get_all_cancer_type_mappings_as_json
 from plot_clinical import get_clinical_variable_scale_types
-
+from payloads import get_precomputed_payload
 
 def plot_data_listing():
     return {
@@ -13,4 +13,7 @@ def plot_data_listing():
       "cancer_type_map": get_all_cancer_type_mappings_as_json(),
       "tissue_types": get_all_tissue_types_as_json(),
       "clinical_variable_scale_types": get_clinical_variable_scale_types()
-    }
\ No newline at end of file
+    }
+
+def get_data_listing_payload():
+    return get_precomputed_payload('data_listing', plot_data_listing)
\ No newline at end of file
@@ -8,7 +8,7 @@ from project_data import ProjectData, get_selected_project_data
 from compute_exposures import compute_exposures
 from scale_samples import scale_samples
 
-def plot_exposures(chosen_sigs, projects, mut_type, single_sample_id=None, normalize=False, tricounts_method=None):
+def plot_exposures(chosen_sigs, projects, mut_type, single_sample_id=None, normalize=False, tricounts_method=None, return_df=False):
     result = []
 
     exps_df = compute_exposures(chosen_sigs, projects, mut_type, single_sample_id=single_sample_id, normalize=normalize, tricounts_method=tricounts_method)
@@ -20,6 +20,12 @@ def plot_exposures(chosen_sigs, projects, mut_type, single_sample_id=None, norma
     else:
         samples = [single_sample_id]
 
+    if return_df:
+        # Samples without exposures get zeros, as in the records below
+        exps_df = exps_df.reindex(samples, fill_value=0)
+        exps_df.index.rename("sample_id", inplace=True)
+        return exps_df
+
     exps_dict = exps_df.to_dict(orient='index')
 
     def create_sample_obj(sample_id):
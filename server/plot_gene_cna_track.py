@@ -6,9 +6,8 @@ from project_data import ProjectData, get_selected_project_data
 
 from helpers import pd_fetch_tsv
 
-def plot_gene_cna_track(gene_id, projects):
-    result = []
-    
+# Yields one DataFrame per project, so that responses can be streamed project by project
+def iter_gene_cna_track(gene_id, projects):
     project_data = get_selected_project_data(projects)
     for proj in project_data:
         proj_id = proj.get_proj_id()
@@ -30,8 +29,11 @@ def plot_gene_cna_track(gene_id, projects):
 
         proj_result_df = proj_result_df.reset_index()
         proj_result_df = proj_result_df.fillna(value="None")
-        proj_result = proj_result_df.to_dict('records')
-        result = (result + proj_result)
-        
+        yield proj_result_df
+
+def plot_gene_cna_track(gene_id, projects):
+    result = []
+    for proj_result_df in iter_gene_cna_track(gene_id, projects):
+        result.extend(proj_result_df.to_dict('records'))
     return result
   
@@ -5,6 +5,7 @@ from web_constants import *
 from project_data import ProjectData, get_selected_project_data
 
 from helpers import pd_fetch_tsv
+from payloads import get_precomputed_payload
 
 MUT_CLASS_PRIORITIES = [
     MUT_CLASS_VALS.SILENT.value, 
@@ -25,9 +26,8 @@ def convert_mut_class_to_priority(val):
         return MUT_CLASS_PRIORITIES.index(val)
     return -1
 
-def plot_gene_mut_track(gene_id, projects):
-    result = []
-    
+# Yields one DataFrame per project, so that responses can be streamed project by project
+def iter_gene_mut_track(gene_id, projects):
     project_data = get_selected_project_data(projects)
     for proj in project_data:
         proj_id = proj.get_proj_id()
@@ -50,9 +50,12 @@ def plot_gene_mut_track(gene_id, projects):
 
         proj_result_df = proj_result_df.reset_index()
         proj_result_df = proj_result_df.fillna(value="None")
-        proj_result = proj_result_df.to_dict('records')
-        result = (result + proj_result)
-        
+        yield proj_result_df
+
+def plot_gene_mut_track(gene_id, projects):
+    result = []
+    for proj_result_df in iter_gene_mut_track(gene_id, projects):
+        result.extend(proj_result_df.to_dict('records'))
     return result
   
 
@@ -91,4 +94,7 @@ def plot_pathways_listing():
             else:
                 row_dict["core"] = False
             result.append(row_dict)
-    return result
\ No newline at end of file
+    return result
+
+def get_pathways_listing_payload():
+    return get_precomputed_payload('pathways_listing', plot_pathways_listing)
\ No newline at end of file
@@ -8,17 +8,23 @@ from project_data import ProjectData, get_selected_project_data
 from compute_reconstruction import compute_reconstruction
 from scale_samples import scale_samples
 
-def plot_reconstruction(chosen_sigs, projects, mut_type, single_sample_id=None, normalize=False, tricounts_method=None):
+def plot_reconstruction(chosen_sigs, projects, mut_type, single_sample_id=None, normalize=False, tricounts_method=None, return_df=False):
     result = []
 
     reconstruction_df = compute_reconstruction(chosen_sigs, projects, mut_type, single_sample_id=single_sample_id, normalize=normalize, tricounts_method=tricounts_method)
-    reconstruction_dict = reconstruction_df.to_dict(orient='index')
 
     if single_sample_id == None:
         samples = scale_samples(projects)
     else:
         samples = [single_sample_id]
 
+    if return_df:
+        reconstruction_df = reconstruction_df.loc[samples]
+        reconstruction_df.index.rename("sample_id", inplace=True)
+        return reconstruction_df
+
+    reconstruction_dict = reconstruction_df.to_dict(orient='index')
+
     def create_sample_obj(sample_id):
         sample_obj = reconstruction_dict[sample_id]
         sample_obj["sample_id"] = sample_id
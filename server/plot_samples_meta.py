@@ -4,8 +4,8 @@ from web_constants import *
 from project_data import ProjectData, get_selected_project_data
 
 
-def plot_samples_meta(projects):
-    result = []
+# Yields one DataFrame per project, so that responses can be streamed project by project
+def iter_samples_meta(projects):
     project_data = get_selected_project_data(projects)
     for proj in project_data:
         proj_df = proj.get_samples_df()
@@ -18,6 +18,10 @@ def plot_samples_meta(projects):
             SAMPLE: "sample_id",
             PATIENT: "donor_id"
         })
-        proj_result = proj_df.to_dict('records')
-        result = (result + proj_result)
+        yield proj_df
+
+def plot_samples_meta(projects):
+    result = []
+    for proj_df in iter_samples_meta(projects):
+        result.extend(proj_df.to_dict('records'))
     return result
\ No newline at end of file
@@ -4,19 +4,21 @@ import pickle
 
 from web_constants import *
 from project_data import ProjectData, get_selected_project_data
+from helpers import pd_concat_rows
 
 def plot_survival(projects):
     result = []
 
     project_data = get_selected_project_data(projects)
-    clinical_df = pd.DataFrame(index=[], data=[], columns=[SURVIVAL_DAYS_TO_DEATH, SURVIVAL_DAYS_TO_LAST_FOLLOWUP])
+    proj_clinical_dfs = []
     for proj in project_data:
         samples = proj.get_samples_list()
         if proj.has_clinical_df():
             proj_clinical_df = proj.get_clinical_df()
         else:
             proj_clinical_df = pd.DataFrame(index=samples, data=[], columns=[])
-        clinical_df = clinical_df.append(proj_clinical_df, ignore_index=False)
+        proj_clinical_dfs.append(proj_clinical_df)
+    clinical_df = pd_concat_rows(proj_clinical_dfs, columns=[SURVIVAL_DAYS_TO_DEATH, SURVIVAL_DAYS_TO_LAST_FOLLOWUP])
     clinical_df = clinical_df.fillna(value='nan')
     
     clinical_df.index = clinical_df.index.rename("sample_id")
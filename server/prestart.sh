@@ -2,4 +2,5 @@
 echo "Fetching data from object store..."
 python /app/scripts/download_data.py
 python /app/scripts/compute_genes.py &
-python /app/scripts/convert_data.py &
\ No newline at end of file
+# Built before the server starts, so that the workers map the matrices and load the snapshot on this boot
+python /app/scripts/convert_data.py && python /app/scripts/build_data_plane.py && python /app/scripts/build_startup_snapshot.py
\ No newline at end of file
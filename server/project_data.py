@@ -1,19 +1,26 @@
 import pandas as pd
+import numpy as np
 import json
 from web_constants import *
 from helpers import pd_fetch_tsv, path_or_none
+from sample_registry import sample_registry, restore_sample_ids
+from compact_dtypes import compact_counts_df
+from data_plane import load_matrix
 from oncotree import *
+from datasets import datasets
 
-""" Load the metadata file to be able to create ProjectData objects """
-meta_df = pd.read_csv(META_DATA_FILE, sep='\t', index_col=0)
-sigs_mapping_df = pd.read_csv(PROJ_TO_SIGS_FILE, sep='\t')
+""" Load the metadata file to be able to create ProjectData objects, on first use """
+def load_projects():
+    return {
+        "meta_df": pd.read_csv(META_DATA_FILE, sep='\t', index_col=0),
+        "sigs_mapping_df": pd.read_csv(PROJ_TO_SIGS_FILE, sep='\t'),
+        "samples_agg_df": pd.read_csv(SAMPLES_AGG_FILE, sep='\t', index_col=0)
+    }
 
-samples_agg_df = pd.read_csv(SAMPLES_AGG_FILE, sep='\t', index_col=0)
+datasets.register('projects', load_projects)
 
-""" Load the Oncotree """
-with open(ONCOTREE_FILE) as f:
-    tree_json = json.load(f)
-tree = OncoTree(tree_json)
+def get_projects_dataset():
+    return datasets.get('projects')
 
 def get_prepend_proj_id_to_sample_id_func(proj_id, proj_source):
     def prepend_proj_id_to_sample_id(sample_id):
@@ -24,16 +31,25 @@ def get_prepend_proj_id_to_sample_id_func(proj_id, proj_source):
         return ("%s %s" % (proj_id, sample_id))
     return prepend_proj_id_to_sample_id
 
+# Vectorized version for a whole column (or index) of sample or patient IDs:
+# each distinct ID is prefixed once, and rows of the same sample share the resulting string
+def prepend_proj_id_to_sample_ids(sample_ids, proj_id, proj_source):
+    codes, unique_ids = pd.factorize(sample_ids)
+    prepend_func = get_prepend_proj_id_to_sample_id_func(proj_id, proj_source)
+    # Missing IDs have code -1, which takes the last element, so that they are prefixed as with Series.apply
+    prefixed_ids = np.array([prepend_func(sample_id) for sample_id in unique_ids] + [prepend_func(np.nan) if (codes == -1).any() else None], dtype=object)
+    return prefixed_ids.take(codes)
+
 # Factory-type function for getting single ProjectData object
 def get_project_data(proj_id):
-    return ProjectData(proj_id, meta_df.loc[proj_id])
+    return ProjectData(proj_id, get_projects_dataset()["meta_df"].loc[proj_id])
 
 def get_selected_project_data(proj_id_list):
     return list(map(lambda proj_id: get_project_data(proj_id), proj_id_list))
 
 # Factory-type function for getting list of all ProjectData objects
 def get_all_project_data():
-    row_tuples = meta_df.to_dict(orient='index').items()
+    row_tuples = get_projects_dataset()["meta_df"].to_dict(orient='index').items()
     return list(map(lambda row: ProjectData(row[0], row[1]), row_tuples))
 
 # Factory-type function for getting 'serialized' list of all ProjectData objects
@@ -59,8 +75,26 @@ def get_all_project_data_as_json():
         }
     return list(map(project_data_to_json, get_all_project_data()))
 
+# Register the samples of all projects with the sample registry, in sorted order, at startup
+def register_all_samples():
+    # The startup snapshot, if any, already lists the samples
+    snapshot = datasets.get_snapshot()
+    snapshot.read_startup_snapshot()
+    if snapshot.sample_ids != None:
+        sample_registry.register_sorted(snapshot.sample_ids)
+    else:
+        sample_registry.register_sorted(get_all_sample_ids())
+
+def get_all_sample_ids():
+    sample_ids = []
+    for proj in get_all_project_data():
+        for mut_type in MUT_TYPES:
+            if proj.has_counts_df(mut_type):
+                sample_ids.extend(proj.get_counts_df(mut_type).index.values)
+    return sorted(set(sample_ids))
+
 def get_all_tissue_types_as_json():
-    return [{'oncotree_name':node.name, 'oncotree_code':node.code} for node in tree.get_tissue_nodes()]
+    return [{'oncotree_name':node.name, 'oncotree_code':node.code} for node in get_oncotree().get_tissue_nodes()]
 
 """ 
 Class representing a single row of the META_DATA_FILE, 
@@ -72,7 +106,7 @@ class ProjectData():
         self.proj_id = proj_id
         self.proj_name = proj_row[META_COL_PROJ_NAME]
         self.oncotree_code = proj_row[META_COL_ONCOTREE_CODE] if pd.notnull(proj_row[META_COL_ONCOTREE_CODE]) else None
-        self.oncotree_node = tree.find_node(self.oncotree_code) if pd.notnull(proj_row[META_COL_ONCOTREE_CODE]) else None
+        self.oncotree_node = get_oncotree().find_node(self.oncotree_code) if pd.notnull(proj_row[META_COL_ONCOTREE_CODE]) else None
         self.proj_source = proj_row[META_COL_PROJ_SOURCE]
         self.seq_type = proj_row[SEQ_TYPE]
         self.counts_paths = {}
@@ -107,13 +141,15 @@ class ProjectData():
         return None
     
     def get_oncotree_tissue_code(self):
-        if self.oncotree_node is not None:
-            return self.oncotree_node.get_tissue_node().code
+        if self.oncotree_code is not None:
+            tissue_node = get_oncotree().get_tissue_node(self.oncotree_code)
+            if tissue_node is not None:
+                return tissue_node.code
         return None
     
     def get_proj_num_samples(self):
         try:
-            return int(samples_agg_df.loc[self.get_proj_id()]["count"])
+            return int(get_projects_dataset()["samples_agg_df"].loc[self.get_proj_id()]["count"])
         except:
             return 0
     
@@ -122,6 +158,9 @@ class ProjectData():
     
     def get_seq_type(self):
         return self.seq_type
+
+    def prepend_proj_id(self, sample_ids):
+        return prepend_proj_id_to_sample_ids(sample_ids, self.get_proj_id(), self.get_proj_source())
     
     # Samples file
     def has_samples_df(self):
@@ -130,34 +169,38 @@ class ProjectData():
     def get_samples_df(self):
         if self.has_samples_df():
             samples_df = pd_fetch_tsv(OBJ_DIR, self.samples_path)
-            samples_df[SAMPLE] = samples_df[SAMPLE].apply(get_prepend_proj_id_to_sample_id_func(self.get_proj_id(), self.get_proj_source()))
-            samples_df[PATIENT] = samples_df[PATIENT].apply(get_prepend_proj_id_to_sample_id_func(self.get_proj_id(), self.get_proj_source()))
+            samples_df[SAMPLE] = self.prepend_proj_id(samples_df[SAMPLE])
+            samples_df[PATIENT] = self.prepend_proj_id(samples_df[PATIENT])
             samples_df = samples_df.set_index(SAMPLE, drop=True)
             return samples_df
         return None
     
     def get_samples_list(self):
-        counts_df = pd.DataFrame(index=[], data=[])
-        for mut_type in MUT_TYPES:
-            if self.has_counts_df(mut_type):
-                cat_type_counts_df = self.get_counts_df(mut_type)
-                counts_df = counts_df.join(cat_type_counts_df, how='outer')
-        
-        counts_df = counts_df.fillna(value=0)
-        counts_df = counts_df.loc[~(counts_df==0).all(axis=1)]
-        return list(counts_df.index.values)
+        counts_df = self.get_all_counts_df_by_key()
+        # Sorted by sample ID, as the outer join of the counts used to sort them
+        return sorted(sample_registry.lookup(counts_df.index.values))
     
     def get_counts_sum_series(self):
-        counts_df = pd.DataFrame(index=[], data=[])
+        counts_df = self.get_all_counts_df_by_key()
+        counts_series = counts_df.sum(axis='columns')
+        return restore_sample_ids(counts_series, name=SAMPLE)
+
+    # Counts of all mutation types, joined on sample keys, without samples which have no mutations
+    def get_all_counts_df_by_key(self):
+        counts_df = None
         for mut_type in MUT_TYPES:
             if self.has_counts_df(mut_type):
-                cat_type_counts_df = self.get_counts_df(mut_type)
-                counts_df = counts_df.join(cat_type_counts_df, how='outer')
+                cat_type_counts_df = self.get_counts_df_by_key(mut_type)
+                if counts_df is None:
+                    counts_df = cat_type_counts_df
+                else:
+                    counts_df = counts_df.join(cat_type_counts_df, how='outer')
+        if counts_df is None:
+            return pd.DataFrame(index=pd.Index([], dtype=np.int32, name=SAMPLE), data=[])
         
         counts_df = counts_df.fillna(value=0)
         counts_df = counts_df.loc[~(counts_df==0).all(axis=1)]
-        counts_series = counts_df.sum(axis='columns')
-        return counts_series
+        return counts_df
     
     # Clinical file
     def has_clinical_df(self):
@@ -170,7 +213,7 @@ class ProjectData():
             samples_list = self.get_samples_list()
             samples_df = samples_df.loc[samples_df[SAMPLE].isin(samples_list)]
             clinical_df = pd_fetch_tsv(OBJ_DIR, self.clinical_path)
-            clinical_df[PATIENT] = clinical_df[PATIENT].apply(get_prepend_proj_id_to_sample_id_func(self.get_proj_id(), self.get_proj_source()))
+            clinical_df[PATIENT] = self.prepend_proj_id(clinical_df[PATIENT])
             clinical_df = samples_df.merge(clinical_df, on=PATIENT, how='left')
             clinical_df = clinical_df.fillna(value='nan')
             clinical_df = clinical_df.set_index(SAMPLE)
@@ -184,7 +227,7 @@ class ProjectData():
     def get_gene_mut_df(self):
         if self.has_gene_mut_df():
             genes_df = pd_fetch_tsv(OBJ_DIR, self.gene_mut_path)
-            genes_df[SAMPLE] = genes_df[SAMPLE].apply(get_prepend_proj_id_to_sample_id_func(self.get_proj_id(), self.get_proj_source()))
+            genes_df[SAMPLE] = self.prepend_proj_id(genes_df[SAMPLE])
             return genes_df
         return None
     
@@ -195,7 +238,7 @@ class ProjectData():
     def get_gene_exp_df(self):
         if self.has_gene_exp_df():
             genes_df = pd_fetch_tsv(OBJ_DIR, self.gene_exp_path)
-            genes_df[SAMPLE] = genes_df[SAMPLE].apply(get_prepend_proj_id_to_sample_id_func(self.get_proj_id(), self.get_proj_source()))
+            genes_df[SAMPLE] = self.prepend_proj_id(genes_df[SAMPLE])
             return genes_df
         return None
     
@@ -210,7 +253,7 @@ class ProjectData():
             genes_df = genes_df.transpose()
             genes_df.index = genes_df.index.rename(SAMPLE)
             genes_df = genes_df.reset_index()
-            genes_df[SAMPLE] = genes_df[SAMPLE].apply(get_prepend_proj_id_to_sample_id_func(self.get_proj_id(), self.get_proj_source()))
+            genes_df[SAMPLE] = self.prepend_proj_id(genes_df[SAMPLE])
             return genes_df
         return None
     
@@ -220,25 +263,40 @@ class ProjectData():
     
     def get_counts_df(self, mut_type):
         if self.has_counts_df(mut_type):
-            counts_df = pd_fetch_tsv(OBJ_DIR, self.counts_paths[mut_type])
-            counts_df = counts_df.set_index(counts_df.columns.values[0])
-            counts_df.index = counts_df.index.rename(SAMPLE)
-            counts_df = counts_df.reset_index()
-            counts_df[SAMPLE] = counts_df[SAMPLE].apply(get_prepend_proj_id_to_sample_id_func(self.get_proj_id(), self.get_proj_source()))
-            counts_df = counts_df.set_index(SAMPLE, drop=True)
-            counts_df = counts_df.dropna(how='any', axis='index')
+            # Use the memory-mapped matrix shared by all workers if the data plane has been built
+            counts_df = load_matrix(self.counts_paths[mut_type])
+            if counts_df is None:
+                counts_df = self.read_counts_df(mut_type)
+            counts_df.index = pd.Index(self.prepend_proj_id(counts_df.index), name=SAMPLE)
+            counts_df = compact_counts_df(counts_df)
             return counts_df
         return None
+
+    # Parse the counts file, with the original sample IDs as the index
+    def read_counts_df(self, mut_type):
+        counts_df = pd_fetch_tsv(OBJ_DIR, self.counts_paths[mut_type])
+        counts_df = counts_df.set_index(counts_df.columns.values[0])
+        counts_df = counts_df.dropna(how='any', axis='index')
+        return counts_df
+
+    # Counts with the sample registry keys as the index rather than the sample IDs
+    def get_counts_df_by_key(self, mut_type):
+        counts_df = self.get_counts_df(mut_type)
+        if counts_df is not None:
+            counts_df.index = pd.Index(sample_registry.intern(counts_df.index.values), name=SAMPLE)
+        return counts_df
     
     def get_sigs_mapping(self):
+        sigs_mapping_df = get_projects_dataset()["sigs_mapping_df"]
+        tree = get_oncotree()
         proj_sigs_mapping_df = sigs_mapping_df.loc[sigs_mapping_df[META_COL_PROJ] == self.proj_id]
-        result = []
-        for index, row in proj_sigs_mapping_df.iterrows():
-            result.append({
-                'sig_group': row[META_COL_SIG_GROUP],
-                'oncotree_code': row[META_COL_ONCOTREE_CODE],
-                'oncotree_name': tree.find_node(row[META_COL_ONCOTREE_CODE]).name # Assume all codes are valid since this is a computed file
-            })
-        return result
+        return [
+            {
+                'sig_group': sig_group,
+                'oncotree_code': oncotree_code,
+                'oncotree_name': tree.find_node(oncotree_code).name # Assume all codes are valid since this is a computed file
+            }
+            for sig_group, oncotree_code in zip(proj_sigs_mapping_df[META_COL_SIG_GROUP], proj_sigs_mapping_df[META_COL_ONCOTREE_CODE])
+        ]
     
 
@@ -1,18 +1,80 @@
 import json
-from starlette.responses import JSONResponse
+from starlette.responses import Response, StreamingResponse
+from json_encoding import encode_json
 
 HEADERS = { 'Access-Control-Allow-Origin': '*' }
 
-def response_json(app, output):
-    return JSONResponse(
+"""
+JSON response encoded with orjson, which also accepts NumPy arrays and pandas objects
+"""
+class FastJSONResponse(Response):
+    media_type = 'application/json'
+
+    def render(self, content):
+        return encode_json(content)
+
+def get_cache_headers(etag, cache_control, vary=None):
+    headers = dict(HEADERS)
+    if etag != None:
+        headers['ETag'] = etag
+        headers['Access-Control-Expose-Headers'] = 'ETag'
+    if cache_control != None:
+        headers['Cache-Control'] = cache_control
+    if vary != None:
+        headers['Vary'] = vary
+    return headers
+
+def response_json(app, output, etag=None, cache_control=None, vary=None):
+    return FastJSONResponse(
         content=output,
         status_code=200,
-        headers=HEADERS
+        headers=get_cache_headers(etag, cache_control, vary=vary)
     )
 
 def response_json_error(app, output, status):
-    return JSONResponse(
+    return FastJSONResponse(
         content=output,
         status_code=status,
         headers=HEADERS
-    )
\ No newline at end of file
+    )
+
+def response_not_modified(app, etag, cache_control=None, vary=None):
+    return Response(
+        content=b'',
+        status_code=304,
+        headers=get_cache_headers(etag, cache_control, vary=vary)
+    )
+
+def response_stream(app, chunks, media_type, encoding=None, etag=None, cache_control=None, vary=None):
+    headers = get_cache_headers(etag, cache_control, vary=vary)
+    if encoding != None:
+        headers['Content-Encoding'] = encoding
+    return StreamingResponse(
+        content=chunks,
+        status_code=200,
+        headers=headers,
+        media_type=media_type
+    )
+
+def response_bytes(app, body, media_type, encoding=None, etag=None, cache_control=None, vary=None):
+    headers = get_cache_headers(etag, cache_control, vary=vary)
+    if encoding != None:
+        headers['Content-Encoding'] = encoding
+    return Response(
+        content=body,
+        status_code=200,
+        headers=headers,
+        media_type=media_type
+    )
+
+def response_payload(app, payload, encoding=None, cache_control=None):
+    headers = get_cache_headers(payload.etag, cache_control)
+    headers['Vary'] = 'Accept-Encoding'
+    if encoding != None:
+        headers['Content-Encoding'] = encoding
+    return Response(
+        content=payload.get_body(encoding),
+        status_code=200,
+        headers=headers,
+        media_type='application/json'
+    )
@@ -0,0 +1,99 @@
+import threading
+import numpy as np
+import pandas as pd
+
+"""
+Registry of the (prefixed) sample IDs of all projects, assigning each a dense int32 key.
+Frames are joined on these keys rather than on the long sample ID strings,
+and the sample IDs are restored before results leave the compute functions.
+The counts frames are still loaded with their sample IDs and converted to keys on each request,
+so they take as much memory as before.
+Only the samples of the data files are registered; sample IDs from requests are looked up.
+Keys are only meaningful within this process.
+"""
+class UnknownSample(Exception):
+    def __init__(self, sample_id):
+        Exception.__init__(self)
+        self.status_code = 404 # Not Found
+        self.message = 'Sample %s not found.' % sample_id
+
+class SampleRegistry():
+
+    def __init__(self):
+        self.keys_by_sample_id = {}
+        self.sample_ids = []
+        self.sample_ids_array = np.empty(0, dtype=object)
+        # Samples registered at startup have keys in the same order as their IDs
+        self.num_ordered = 0
+        self.lock = threading.Lock()
+
+    # Register the samples of all projects at once, in sorted order,
+    # so that sorting by key gives the same order as sorting by sample ID.
+    # Does nothing if samples were already registered, e.g. by requests before the warm-up,
+    # since their keys may be in use; results are then sorted by sample ID instead.
+    def register_sorted(self, sample_ids):
+        with self.lock:
+            if len(self.sample_ids) == 0:
+                for sample_id in sorted(set(sample_ids)):
+                    self.add_sample_id(sample_id)
+                self.num_ordered = len(self.sample_ids)
+
+    # Get the keys for sample IDs from a request, which must already be registered,
+    # so that requests do not grow the registry
+    def get_keys(self, sample_ids):
+        with self.lock:
+            try:
+                return np.array([self.keys_by_sample_id[sample_id] for sample_id in sample_ids], dtype=np.int32)
+            except KeyError as e:
+                raise UnknownSample(e.args[0])
+
+    # Get the keys for an array of sample IDs from the data files, registering any new samples
+    def intern(self, sample_ids):
+        codes, unique_ids = pd.factorize(np.asarray(sample_ids, dtype=object))
+        unique_keys = np.empty(len(unique_ids), dtype=np.int32)
+        with self.lock:
+            for i, sample_id in enumerate(unique_ids):
+                key = self.keys_by_sample_id.get(sample_id)
+                if key is None:
+                    key = self.add_sample_id(sample_id)
+                unique_keys[i] = key
+        return unique_keys.take(codes)
+
+    # Must be called with the lock held
+    def add_sample_id(self, sample_id):
+        key = len(self.sample_ids)
+        self.keys_by_sample_id[sample_id] = key
+        self.sample_ids.append(sample_id)
+        return key
+
+    # Get the sample IDs for an array of keys
+    def lookup(self, keys):
+        with self.lock:
+            if len(self.sample_ids_array) != len(self.sample_ids):
+                self.sample_ids_array = np.array(self.sample_ids, dtype=object)
+            sample_ids_array = self.sample_ids_array
+        return sample_ids_array.take(np.asarray(keys, dtype=np.int64))
+
+    def is_ordered(self, keys):
+        return len(keys) == 0 or np.max(keys) < self.num_ordered
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "samples": len(self.sample_ids),
+                "ordered": self.num_ordered
+            }
+
+sample_registry = SampleRegistry()
+
+# Replace the key index of a frame by the sample IDs, sorted by sample ID
+# as the outer joins on sample ID strings used to sort them.
+# Frames which only have samples registered in sorted order are sorted by key, which gives the same order.
+def restore_sample_ids(df, name=None):
+    if sample_registry.is_ordered(df.index.values):
+        df = df.sort_index()
+        df.index = pd.Index(sample_registry.lookup(df.index.values), name=name)
+    else:
+        df.index = pd.Index(sample_registry.lookup(df.index.values), name=name)
+        df = df.sort_index()
+    return df
@@ -2,9 +2,15 @@ import pandas as pd
 
 from web_constants import *
 from project_data import ProjectData, get_selected_project_data
+from caching import cached_result
 
 
 def scale_samples(projects):
+    return list(compute_samples_order(projects))
+
+# The sample ordering is shared by every per-sample plot, so it is cached
+@cached_result('scale_samples')
+def compute_samples_order(projects):
     project_data = get_selected_project_data(projects)
     result_series = pd.concat([proj.get_counts_sum_series() for proj in project_data])
     result_series = result_series.sort_values(ascending=False)
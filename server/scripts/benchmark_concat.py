@@ -0,0 +1,91 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import time
+import argparse
+
+# Load our modules
+this_file_path = os.path.abspath(os.path.dirname(__file__))
+sys.path.append(os.path.normpath(this_file_path + '/../'))
+from helpers import pd_concat_rows
+
+"""
+Compare growing results project by project (DataFrame.append and list concatenation, as the plot layer did)
+with collecting the per-project results and concatenating them once.
+Uses random per-project counts matrices with SBS 96 contexts,
+e.g. python benchmark_concat.py --projects 1 10 30 60 --samples 500
+"""
+
+NUM_CONTEXTS = 96
+
+def make_proj_dfs(num_projects, num_samples):
+    contexts = ["C%d" % i for i in range(NUM_CONTEXTS)]
+    return [
+        pd.DataFrame(
+            index=["P%d S%d" % (p, s) for s in range(num_samples)],
+            columns=contexts,
+            data=np.random.randint(0, 100, size=(num_samples, NUM_CONTEXTS)).astype(float)
+        )
+        for p in range(num_projects)
+    ]
+
+def append_rows(df, other):
+    # DataFrame.append has been removed from pandas, it was implemented as a concat of both DataFrames
+    if hasattr(df, 'append'):
+        return df.append(other)
+    return pd.concat([df, other], sort=False)
+
+# The DataFrame.append loop, as in compute_counts and compute_exposures before
+def df_previous(proj_dfs):
+    df = pd.DataFrame(index=[], data=[], columns=proj_dfs[0].columns.values)
+    for proj_df in proj_dfs:
+        df = append_rows(df, proj_df)
+    return df
+
+def df_current(proj_dfs):
+    return pd_concat_rows(list(proj_dfs), columns=proj_dfs[0].columns.values)
+
+# The list concatenation loop, as in the plot_* functions before
+def records_previous(proj_records):
+    result = []
+    for proj_result in proj_records:
+        result = (result + proj_result)
+    return result
+
+def records_current(proj_records):
+    result = []
+    for proj_result in proj_records:
+        result.extend(proj_result)
+    return result
+
+def time_func(func, arg, repeats):
+    times = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        func(arg)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark growing results across projects')
+    parser.add_argument('--projects', type=int, nargs='+', default=[1, 5, 10, 20, 40, 60])
+    parser.add_argument('--samples', type=int, default=500, help='Samples per project')
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    print("%10s %18s %18s %22s %22s" % ("projects", "append (ms)", "concat (ms)", "list concat (ms)", "list extend (ms)"))
+    for num_projects in args.projects:
+        proj_dfs = make_proj_dfs(num_projects, args.samples)
+        proj_records = [proj_df.reset_index().to_dict('records') for proj_df in proj_dfs]
+        # Both paths must produce the same result
+        assert(df_previous(proj_dfs).astype(float).equals(df_current(proj_dfs)))
+        assert(records_previous(proj_records) == records_current(proj_records))
+
+        print("%10d %18.1f %18.1f %22.1f %22.1f" % (
+            num_projects,
+            time_func(df_previous, proj_dfs, args.repeats) * 1000,
+            time_func(df_current, proj_dfs, args.repeats) * 1000,
+            time_func(records_previous, proj_records, args.repeats) * 1000,
+            time_func(records_current, proj_records, args.repeats) * 1000
+        ))
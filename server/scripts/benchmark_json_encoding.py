@@ -0,0 +1,65 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import json
+import time
+import argparse
+
+# Load our modules
+this_file_path = os.path.abspath(os.path.dirname(__file__))
+sys.path.append(os.path.normpath(this_file_path + '/../'))
+from json_encoding import encode_json
+
+"""
+Compare the previous and current JSON paths for /plot-exposures payloads:
+previously plot_exposures built a list of records from DataFrame.to_dict and starlette's JSONResponse
+encoded it with the json module, now the DataFrame is encoded directly with orjson.
+Uses a random exposures matrix with the same shape as the real data,
+e.g. python benchmark_json_encoding.py --samples 1000 10000 --signatures 30
+"""
+
+def make_exposures_df(num_samples, num_signatures):
+    samples = ["TCGA-BRCA_BRCA_mc3.v0.2.8.WXS TCGA-%06d" % i for i in range(num_samples)]
+    signatures = ["COSMIC %d" % (i + 1) for i in range(num_signatures)]
+    exps_df = pd.DataFrame(index=samples, columns=signatures, data=(np.random.rand(num_samples, num_signatures) * 1000))
+    exps_df.index.rename("sample_id", inplace=True)
+    return exps_df
+
+# The path taken by plot_exposures and response_json before
+def encode_previous(exps_df):
+    exps_dict = exps_df.to_dict(orient='index')
+    result = []
+    for sample_id in exps_df.index.values:
+        sample_obj = exps_dict[sample_id]
+        sample_obj["sample_id"] = sample_id
+        result.append(sample_obj)
+    return json.dumps(result, ensure_ascii=False, allow_nan=False, indent=None, separators=(',', ':')).encode('utf-8')
+
+def encode_current(exps_df):
+    return encode_json(exps_df)
+
+def time_encoding(func, exps_df, repeats):
+    times = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        body = func(exps_df)
+        times.append(time.perf_counter() - start)
+    return min(times), len(body)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark JSON encoding of /plot-exposures payloads')
+    parser.add_argument('--samples', type=int, nargs='+', default=[1000, 5000, 10000])
+    parser.add_argument('--signatures', type=int, default=30)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    print("%10s %14s %14s %10s %12s" % ("samples", "previous (ms)", "current (ms)", "speedup", "size (MB)"))
+    for num_samples in args.samples:
+        exps_df = make_exposures_df(num_samples, args.signatures)
+        # Both paths must produce the same records
+        assert(sorted(json.loads(encode_previous(exps_df)), key=lambda r: r["sample_id"]) == sorted(json.loads(encode_current(exps_df)), key=lambda r: r["sample_id"]))
+
+        previous_time, previous_size = time_encoding(encode_previous, exps_df, args.repeats)
+        current_time, current_size = time_encoding(encode_current, exps_df, args.repeats)
+        print("%10d %14.1f %14.1f %9.1fx %12.2f" % (num_samples, previous_time * 1000, current_time * 1000, previous_time / current_time, current_size / 1e6))
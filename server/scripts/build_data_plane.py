@@ -0,0 +1,31 @@
+import pandas as pd
+import os
+import sys
+import time
+
+# Load our modules
+this_file_path = os.path.abspath(os.path.dirname(__file__))
+sys.path.append(os.path.normpath(this_file_path + '/../'))
+from web_constants import *
+from project_data import get_all_project_data
+from compact_dtypes import compact_counts_df
+from data_plane import write_matrix, load_matrix
+
+"""
+Write the counts matrices of all projects to the data plane (see data_plane.py),
+to be memory-mapped by every server worker rather than parsed by each of them.
+Run after convert_data.py, since a matrix older than its parquet file is considered stale.
+With EXPLOSIG_COMPACT_DTYPES set, the counts are written as uint32, as the server would load them.
+"""
+
+if __name__ == "__main__":
+  print('* Building data plane')
+  start = time.time()
+  num_matrices = 0
+  for proj in get_all_project_data():
+    for mut_type in MUT_TYPES:
+      if proj.has_counts_df(mut_type) and load_matrix(proj.counts_paths[mut_type]) is None:
+        write_matrix(proj.counts_paths[mut_type], compact_counts_df(proj.read_counts_df(mut_type)))
+        num_matrices += 1
+  print('* Wrote %d matrices in %.1f s' % (num_matrices, time.time() - start))
+  print('* Done')
@@ -0,0 +1,35 @@
+import os
+import sys
+import time
+
+# Load our modules
+this_file_path = os.path.abspath(os.path.dirname(__file__))
+sys.path.append(os.path.normpath(this_file_path + '/../'))
+from web_constants import *
+from datasets import datasets
+from startup_snapshot import read_startup_snapshot, write_startup_snapshot
+import sig_data
+import tricounts_data
+import project_data
+import compute_clinical
+
+"""
+Write the processed datasets and the sorted sample IDs of the current data version
+to a single binary snapshot (see startup_snapshot.py), which the server loads at startup
+rather than parsing and processing the files in /obj.
+Run after build_data_plane.py, since listing the samples loads the counts of every project.
+"""
+
+if __name__ == "__main__":
+  print('* Building startup snapshot')
+  start = time.time()
+  snapshot = datasets.get_snapshot()
+  if read_startup_snapshot(snapshot.version) != None:
+    print('* Startup snapshot for data version %s is up to date' % snapshot.version)
+  else:
+    # Loads every dataset from the files, since there is no snapshot for this version
+    datasets.warm_up()
+    sample_ids = project_data.get_all_sample_ids()
+    write_startup_snapshot(snapshot.version, snapshot.datasets, sample_ids)
+    print('* Wrote startup snapshot for data version %s in %.1f s' % (snapshot.version, time.time() - start))
+  print('* Done')
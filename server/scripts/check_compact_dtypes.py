@@ -0,0 +1,54 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+
+# Load the data with the default float64 dtypes, to compare against the compact dtypes
+os.environ.pop('EXPLOSIG_COMPACT_DTYPES', None)
+
+# Load our modules
+this_file_path = os.path.abspath(os.path.dirname(__file__))
+sys.path.append(os.path.normpath(this_file_path + '/../'))
+from web_constants import *
+from compact_dtypes import can_store_as_counts, check_float_precision, COUNTS_DTYPE, FLOAT32_MAX_RELATIVE_ERROR
+from project_data import get_all_project_data
+from sig_data import get_signatures_dataset
+
+"""
+Check the precision of the compact dtypes (see compact_dtypes.py) against the data in /obj:
+counts must be stored as uint32 without loss, and signatures stored as float32
+must stay within the float32 rounding error and still sum to one.
+Also reports the memory used by each with float64 and compact dtypes.
+"""
+
+def check_counts():
+  print('* Counts (uint32)')
+  num_bytes = 0
+  num_compact_bytes = 0
+  for proj in get_all_project_data():
+    for mut_type in MUT_TYPES:
+      counts_df = proj.get_counts_df(mut_type)
+      if counts_df is None:
+        continue
+      values = counts_df.values.astype(np.float64)
+      num_bytes += values.nbytes
+      if can_store_as_counts(values):
+        num_compact_bytes += values.size * np.dtype(COUNTS_DTYPE).itemsize
+      else:
+        num_compact_bytes += values.nbytes
+        print('  %s %s: not integer counts, kept as float64' % (proj.get_proj_id(), mut_type))
+  print('  %d bytes as float64, %d bytes compact' % (num_bytes, num_compact_bytes))
+
+def check_signatures():
+  print('* Signatures (float32, max relative error %g)' % FLOAT32_MAX_RELATIVE_ERROR)
+  for cat_type, sig_df in get_signatures_dataset()["sig_dfs"].items():
+    values = sig_df.values.astype(np.float64)
+    compact_values = values.astype(np.float32)
+    error = check_float_precision(values, compact_values)
+    sum_error = np.max(np.abs(compact_values.astype(np.float64).sum(axis=1) - values.sum(axis=1))) if values.size > 0 else 0.0
+    status = ('ok' if error <= FLOAT32_MAX_RELATIVE_ERROR else 'FAILED')
+    print('  %s: max relative error %g, max row sum difference %g, %d bytes as float64, %d bytes compact (%s)' % (cat_type, error, sum_error, values.nbytes, compact_values.nbytes, status))
+
+if __name__ == "__main__":
+  check_counts()
+  check_signatures()
@@ -34,7 +34,7 @@ def clean_data_files(data_row):
       genes_agg_df = pd.read_csv(GENES_AGG_FILE.format(letter=letter), sep='\t')
       genes_df_by_letter = genes_df.loc[genes_df[GENE_SYMBOL].str.startswith(letter)]
       if genes_df_by_letter.shape[0] > 0:
-        genes_agg_df = genes_agg_df.append(genes_df_by_letter, ignore_index=True)
+        genes_agg_df = pd.concat([genes_agg_df, genes_df_by_letter], ignore_index=True, sort=False)
         genes_agg_df.to_csv(GENES_AGG_FILE.format(letter=letter), sep='\t', index=False)
 
 if __name__ == "__main__":
@@ -6,8 +6,8 @@ import json
 import string
 from datetime import datetime
 
-from sqlalchemy import create_engine
-from sqlalchemy import MetaData, Table, Column, Integer, String, Text, DateTime
+from sqlalchemy import create_engine, inspect
+from sqlalchemy import MetaData, Table, Column, Integer, String, Text, DateTime, UniqueConstraint
 
 # Load our modules
 this_file_path = os.path.abspath(os.path.dirname(__file__))
@@ -73,7 +73,7 @@ def clean_data_files(data_row):
   counts_df = counts_df.loc[~(counts_df==0).all(axis=1)]
   # compute the number of samples and append a row to the samples agg dataframe
   num_samples = len(list(counts_df.index.values))
-  samples_agg_df = samples_agg_df.append({META_COL_PROJ: data_row[META_COL_PROJ], "count": num_samples}, ignore_index=True)
+  samples_agg_df = pd.concat([samples_agg_df, pd.DataFrame(data=[{META_COL_PROJ: data_row[META_COL_PROJ], "count": num_samples}])], ignore_index=True, sort=False)
   samples_agg_df.to_csv(SAMPLES_AGG_FILE, sep='\t', index=False)
 
 def download_oncotree():
@@ -91,22 +91,25 @@ def load_oncotree():
 def create_proj_to_sigs_mapping(data_df, sigs_df):
   print('* Mapping projects to signature cancer types by Oncotree codes')
   tree = load_oncotree()
-  match_df = pd.DataFrame(index=[], data=[], columns=[META_COL_PROJ, META_COL_SIG_GROUP, META_COL_ONCOTREE_CODE])
+  # Read the oncotree codes of each signature group's cancer type map once, rather than once per project
+  sig_group_codes = []
+  for sig_group_index, sig_group_row in sigs_df.iterrows():
+    if pd.notnull(sig_group_row[META_COL_PATH_SIGS_CANCER_TYPE_MAP]):
+      sig_group_cancer_type_map_df = read_tsv(sig_group_row[META_COL_PATH_SIGS_CANCER_TYPE_MAP])
+      cancer_type_map_codes = set(sig_group_cancer_type_map_df[META_COL_ONCOTREE_CODE].dropna().unique())
+      sig_group_codes.append((sig_group_row[META_COL_SIG_GROUP], cancer_type_map_codes))
+  matches = []
   for data_index, data_row in data_df.iterrows():
     if pd.notnull(data_row[META_COL_ONCOTREE_CODE]):
-      proj_node = tree.find_node(data_row[META_COL_ONCOTREE_CODE])
-      if proj_node is not None:
-        for sig_group_index, sig_group_row in sigs_df.iterrows():
-          if pd.notnull(sig_group_row[META_COL_PATH_SIGS_CANCER_TYPE_MAP]):
-            sig_group_cancer_type_map_df = read_tsv(sig_group_row[META_COL_PATH_SIGS_CANCER_TYPE_MAP])
-            cancer_type_map_codes = list(sig_group_cancer_type_map_df[META_COL_ONCOTREE_CODE].dropna().unique())
-            sig_group_parent_node = proj_node.find_closest_parent(cancer_type_map_codes)
-            if sig_group_parent_node is not None:
-              match_df = match_df.append({
-                META_COL_PROJ: data_row[META_COL_PROJ],
-                META_COL_SIG_GROUP: sig_group_row[META_COL_SIG_GROUP],
-                META_COL_ONCOTREE_CODE: sig_group_parent_node.code
-              }, ignore_index=True)
+      for sig_group, cancer_type_map_codes in sig_group_codes:
+        sig_group_parent_node = tree.find_closest_parent(data_row[META_COL_ONCOTREE_CODE], cancer_type_map_codes)
+        if sig_group_parent_node is not None:
+          matches.append({
+            META_COL_PROJ: data_row[META_COL_PROJ],
+            META_COL_SIG_GROUP: sig_group,
+            META_COL_ONCOTREE_CODE: sig_group_parent_node.code
+          })
+  match_df = pd.DataFrame(data=matches, columns=[META_COL_PROJ, META_COL_SIG_GROUP, META_COL_ONCOTREE_CODE])
   match_df.to_csv(PROJ_TO_SIGS_FILE, index=False, sep='\t')
 
 def create_db_tables():
@@ -131,6 +134,19 @@ def create_db_tables():
       Column('id', Integer(), primary_key=True), 
       Column('session_id', String(length=255)), 
       Column('data', Text()), 
+      Column('version', Integer(), nullable=False, default=0), 
+      Column('previous_data', Text(), nullable=True), 
+      Column('previous_version', Integer(), nullable=True), 
+      extend_existing=True
+    )
+    Table(
+      'session_deltas', 
+      metadata, 
+      Column('id', Integer(), primary_key=True), 
+      Column('session_id', String(length=255)), 
+      Column('version', Integer(), nullable=False), 
+      Column('patch', Text()), 
+      UniqueConstraint('session_id', 'version'), 
       extend_existing=True
     )
     Table(
@@ -142,6 +158,13 @@ def create_db_tables():
       extend_existing=True
     )
     metadata.create_all()
+    # Add the version columns to sessions tables created before session deltas
+    sessions_columns = [column['name'] for column in inspect(engine).get_columns('sessions')]
+    if 'version' not in sessions_columns:
+      connection.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+    if 'previous_version' not in sessions_columns:
+      connection.execute("ALTER TABLE sessions ADD COLUMN previous_data TEXT NULL")
+      connection.execute("ALTER TABLE sessions ADD COLUMN previous_version INTEGER NULL")
     print('* Successfully connected to database and created tables')
   except Exception as e:
     print(e)
@@ -2,50 +2,289 @@ import os
 import uuid
 import json
 import pandas as pd
-from db import connect
-import requests
+from db import connect, get_table
+from caching import LRUCache
+import jsonpatch
+from sqlalchemy import and_
+from sqlalchemy.exc import IntegrityError
+import asyncio
+import time
+import aiohttp
 import websockets
 from starlette.websockets import WebSocketDisconnect
 from websockets.exceptions import ConnectionClosed
 from web_constants import EXPLOSIG_CONNECT_HOST
 
-def session_get(session_id):
-    table, conn = connect('sessions')
+# Settings for requests to the connect service
+CONNECT_POOL_SIZE = 10
+CONNECT_KEEPALIVE_TIMEOUT = 60
+CONNECT_TIMEOUT = 5
+CONNECT_RETRIES = 2
+CONNECT_RETRY_BACKOFF = 0.1
+# Responses meaning the connect service did not handle the request, which can be retried
+CONNECT_RETRY_STATUSES = (502, 503)
 
+connect_client = None
+
+# Number of deltas after which a new snapshot of the session state is written
+SESSION_SNAPSHOT_INTERVAL = 20
+
+SESSION_CACHE_MAX_ENTRIES = 256
+SESSION_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# Maps session IDs to their latest known (state, version), updated when the session is written.
+# Other workers may have written newer versions, so the deltas after the cached version are always read.
+session_cache = LRUCache(SESSION_CACHE_MAX_ENTRIES, max_bytes=SESSION_CACHE_MAX_BYTES)
+
+class SessionError(Exception):
+    def __init__(self, message, status_code):
+        Exception.__init__(self)
+        self.status_code = status_code
+        self.message = message
+
+# The state is a string holding the serialized explorer state, which is itself stored JSON-encoded
+def get_session_snapshot(conn, table, session_id):
     sel = table.select().where(table.c.session_id == session_id)
-    res = conn.execute(sel)
-    row = res.fetchone()
+    row = conn.execute(sel).fetchone()
+    if row == None:
+        raise SessionError('Session not found.', 404)
+    return json.loads(row['data']), row['version']
 
-    return { "state": json.loads(row['data']) }
+# The snapshot before the latest one, from which the versions of the last snapshot interval are rebuilt
+def get_previous_session_snapshot(conn, table, session_id, version):
+    sel = table.select().where(table.c.session_id == session_id)
+    row = conn.execute(sel).fetchone()
+    if row == None:
+        raise SessionError('Session not found.', 404)
+    if row['previous_version'] == None or version < row['previous_version']:
+        raise SessionError('Session version %d is no longer available.' % version, 410)
+    return json.loads(row['previous_data']), row['previous_version']
 
-def session_start(state):
-    table, conn = connect('sessions')
+def get_session_deltas(conn, deltas_table, session_id, after_version, until_version=None):
+    sel = deltas_table.select().where(and_(deltas_table.c.session_id == session_id, deltas_table.c.version > after_version))
+    if until_version != None:
+        sel = sel.where(deltas_table.c.version <= until_version)
+    sel = sel.order_by(deltas_table.c.version)
+    return [(row['version'], json.loads(row['patch'])) for row in conn.execute(sel)]
 
+def cache_session_state(session_id, state, version):
+    session_cache.set(session_id, (state, version), size=len(state))
+
+# Get the latest known state of a session and the version it is based on,
+# from the cache if possible, and then the deltas after it up to until_version
+def load_session_state(conn, table, deltas_table, session_id, until_version=None):
+    found, cached = session_cache.get(session_id)
+    # Older versions may only be available from the deltas before the cached version
+    if found and (until_version == None or until_version >= cached[1]):
+        state, base_version = cached
+        deltas = get_session_deltas(conn, deltas_table, session_id, base_version, until_version=until_version)
+        if len(deltas) == 0 or deltas[0][0] == base_version + 1:
+            return state, base_version, deltas
+        # The deltas after the cached version have been compacted away by another worker
+        session_cache.delete(session_id)
+
+    state, base_version = get_session_snapshot(conn, table, session_id)
+    cache_session_state(session_id, state, base_version)
+    deltas = get_session_deltas(conn, deltas_table, session_id, base_version, until_version=until_version)
+    return state, base_version, deltas
+
+# Apply JSON-patch deltas, in order, to the state of a snapshot
+def apply_session_deltas(state, version, deltas):
+    if len(deltas) == 0:
+        return state, version
+    state_obj = json.loads(state)
+    for delta_version, patch in deltas:
+        if delta_version != version + 1:
+            raise SessionError('Session version %d is no longer available.' % (version + 1), 410)
+        state_obj = jsonpatch.apply_patch(state_obj, patch)
+        version = delta_version
+    return json.dumps(state_obj), version
+
+# Get the state of a session as of a version, by default the latest version
+def session_get(session_id, version=None):
+    with connect('sessions') as (table, conn):
+        deltas_table = get_table('session_deltas')
+        state, base_version, deltas = load_session_state(conn, table, deltas_table, session_id, until_version=version)
+        if version != None and version < base_version:
+            state, base_version = get_previous_session_snapshot(conn, table, session_id, version)
+            deltas = get_session_deltas(conn, deltas_table, session_id, base_version, until_version=version)
+
+    state, state_version = apply_session_deltas(state, base_version, deltas)
+    if version != None and state_version != version:
+        raise SessionError('Session version %d not found.' % version, 404)
+    if version == None and state_version != base_version:
+        cache_session_state(session_id, state, state_version)
+    return { "state": state, "version": state_version }
+
+def session_start(state):
     session_id = str(uuid.uuid4())[:8]
-    ins = table.insert().values(session_id=session_id, data=json.dumps(state))
-    conn.execute(ins)
+    with connect('sessions') as (table, conn):
+        ins = table.insert().values(session_id=session_id, data=json.dumps(state), version=0)
+        conn.execute(ins)
 
-    return { "session_id": session_id }
+    cache_session_state(session_id, state, 0)
+    return { "session_id": session_id, "version": 0 }
+
+# Store a JSON-patch delta against the given base version of the session state.
+# Fails with a conflict if the session has been modified since the base version.
+def session_patch(session_id, base_version, patch):
+    with connect('session_deltas') as (deltas_table, conn):
+        table = get_table('sessions')
+        state, state_version, deltas = load_session_state(conn, table, deltas_table, session_id)
+        state, state_version = apply_session_deltas(state, state_version, deltas)
+        if base_version != state_version:
+            raise SessionError('Session has been modified since version %d.' % base_version, 409)
+        # Check that the patch applies, so that an invalid patch is never stored
+        try:
+            state, version = apply_session_deltas(state, state_version, [(state_version + 1, patch)])
+        except (jsonpatch.JsonPatchException, jsonpatch.JsonPointerException):
+            raise SessionError('Invalid session patch.', 422)
+
+        try:
+            ins = deltas_table.insert().values(session_id=session_id, version=version, patch=json.dumps(patch))
+            conn.execute(ins)
+        except IntegrityError:
+            # Another delta was stored against the same base version in the meantime
+            session_cache.delete(session_id)
+            raise SessionError('Session has been modified since version %d.' % base_version, 409)
+        cache_session_state(session_id, state, version)
+
+        if version % SESSION_SNAPSHOT_INTERVAL == 0:
+            compact_session(conn, table, deltas_table, session_id, state, version)
+
+    return { "session_id": session_id, "version": version }
+
+# Write a new snapshot of the state, keeping the current snapshot as the previous one,
+# then delete the deltas from before the previous snapshot.
+# The previous snapshot and the deltas after it are kept, so that the versions of the last interval stay available.
+def compact_session(conn, table, deltas_table, session_id, state, version):
+    with conn.begin():
+        row = conn.execute(table.select().where(table.c.session_id == session_id)).fetchone()
+        if row == None or row['version'] >= version:
+            return
+        previous_version = row['version']
+        upd = table.update().where(and_(table.c.session_id == session_id, table.c.version == previous_version)).values(
+            previous_data=row['data'],
+            previous_version=previous_version,
+            data=json.dumps(state),
+            version=version
+        )
+        res = conn.execute(upd)
+        if res.rowcount > 0:
+            # Only the request which wrote the snapshot removes the old deltas
+            dlt = deltas_table.delete().where(and_(deltas_table.c.session_id == session_id, deltas_table.c.version <= previous_version))
+            conn.execute(dlt)
+
+def get_session_cache_stats():
+    return session_cache.get_stats()
+
+# Counters for the websocket relay between clients and the connect service
+relay_stats = {
+    "open_connections": 0,
+    "messages_to_client": 0,
+    "messages_to_connect": 0,
+    "relay_seconds_total": 0.0
+}
+
+def record_relay(direction, start):
+    relay_stats["messages_to_" + direction] += 1
+    relay_stats["relay_seconds_total"] += (time.monotonic() - start)
+
+def get_relay_stats():
+    num_messages = relay_stats["messages_to_client"] + relay_stats["messages_to_connect"]
+    return {
+        "open_connections": relay_stats["open_connections"],
+        "messages_to_client": relay_stats["messages_to_client"],
+        "messages_to_connect": relay_stats["messages_to_connect"],
+        "mean_relay_latency_ms": (relay_stats["relay_seconds_total"] * 1000 / num_messages if num_messages > 0 else 0.0)
+    }
+
+# Frames are forwarded as-is, without decoding and re-encoding the JSON
+async def relay_to_client(websocket_out, websocket_in):
+    while True:
+        try:
+            message = await websocket_out.recv()
+        except ConnectionClosed:
+            return
+        start = time.monotonic()
+        if isinstance(message, bytes):
+            await websocket_in.send_bytes(message)
+        else:
+            await websocket_in.send_text(message)
+        record_relay("client", start)
+
+async def relay_to_connect(websocket_in, websocket_out):
+    while True:
+        message = await websocket_in.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+        start = time.monotonic()
+        if message.get("text") is not None:
+            await websocket_out.send(message["text"])
+        elif message.get("bytes") is not None:
+            await websocket_out.send(message["bytes"])
+        record_relay("connect", start)
 
 async def session_connect(websocket_in):
     await websocket_in.accept()
-    init_json = await websocket_in.receive_json()
+    init_text = await websocket_in.receive_text()
     url = 'ws://' + EXPLOSIG_CONNECT_HOST + '/global-session-connect'
-    async with websockets.connect(url) as websocket_out:
-        await websocket_out.send(json.dumps(init_json))
-        while True:
-            try:
-                data = json.loads(await websocket_out.recv())
-                try:
-                    await websocket_in.send_json(data)
-                except ConnectionClosed:
-                    break
-            except WebSocketDisconnect:
-                break
+    relay_stats["open_connections"] += 1
+    try:
+        async with websockets.connect(url) as websocket_out:
+            await websocket_out.send(init_text)
+            # Relay in both directions until either side disconnects
+            relays = [
+                asyncio.ensure_future(relay_to_client(websocket_out, websocket_in)),
+                asyncio.ensure_future(relay_to_connect(websocket_in, websocket_out))
+            ]
+            done, pending = await asyncio.wait(relays, return_when=asyncio.FIRST_COMPLETED)
+            for relay in pending:
+                relay.cancel()
+            # Wait for the cancellations, and treat errors on either side as a disconnect
+            await asyncio.gather(*relays, return_exceptions=True)
+    except (ConnectionClosed, OSError, WebSocketDisconnect):
+        pass
+    finally:
+        relay_stats["open_connections"] -= 1
+        try:
+            await websocket_in.close()
+        except Exception:
+            pass
+
+async def get_connect_client():
+    # One client session with a keep-alive connection pool per process, created on first use
+    global connect_client
+    if connect_client is None or connect_client.closed:
+        connect_client = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=CONNECT_POOL_SIZE, keepalive_timeout=CONNECT_KEEPALIVE_TIMEOUT),
+            timeout=aiohttp.ClientTimeout(total=CONNECT_TIMEOUT)
+        )
+    return connect_client
+
+async def close_connect_client():
+    global connect_client
+    if connect_client is not None:
+        await connect_client.close()
+        connect_client = None
 
 async def session_post(session_id, data):
     url = 'http://' + EXPLOSIG_CONNECT_HOST + '/global-session-post'
     payload = { 'data': data, 'session_id': session_id }
-    r = requests.post(url, data=json.dumps(payload))
-    r.raise_for_status()
-    return r.json()
\ No newline at end of file
+    body = json.dumps(payload)
+    client = await get_connect_client()
+    # Broadcasts are not idempotent, so only retry when the message cannot have been delivered:
+    # failures to connect, before the request is sent, and responses saying it was not handled.
+    # Timeouts, dropped connections and other error responses are not retried.
+    for attempt in range(CONNECT_RETRIES + 1):
+        is_last_attempt = (attempt == CONNECT_RETRIES)
+        try:
+            async with client.post(url, data=body) as r:
+                if is_last_attempt or r.status not in CONNECT_RETRY_STATUSES:
+                    r.raise_for_status()
+                    return await r.json(content_type=None)
+        except aiohttp.ClientConnectorError:
+            if is_last_attempt:
+                raise
+        # Exponential backoff before retrying
+        await asyncio.sleep(CONNECT_RETRY_BACKOFF * (2 ** attempt))
\ No newline at end of file
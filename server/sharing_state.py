@@ -3,28 +3,49 @@ import uuid
 import json
 import pandas as pd
 from db import connect
+from caching import LRUCache
+from payloads import get_precomputed_payload
 
 from web_constants import META_FEATURED_FILE
 
+SHARING_CACHE_MAX_ENTRIES = 1024
+SHARING_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# Sharing states never change once written, so the parsed states can be cached without invalidation.
+# Sizes are approximated by the length of the stored JSON text.
+sharing_cache = LRUCache(SHARING_CACHE_MAX_ENTRIES, max_bytes=SHARING_CACHE_MAX_BYTES)
+
 def get_sharing_state(slug):
-    table, conn = connect('sharing')
+    found, output = sharing_cache.get(slug)
+    if found:
+        return output
 
-    sel = table.select().where(table.c.slug == slug)
-    res = conn.execute(sel)
-    row = res.fetchone()
+    with connect('sharing') as (table, conn):
+        sel = table.select().where(table.c.slug == slug)
+        res = conn.execute(sel)
+        row = res.fetchone()
 
-    return { "state": json.loads(row['data']) }
+    output = { "state": json.loads(row['data']) }
+    sharing_cache.set(slug, output, size=len(row['data']))
+    return output
 
 def set_sharing_state(state):
-    table, conn = connect('sharing')
-
     slug = str(uuid.uuid4())[:8]
-    ins = table.insert().values(slug=slug, data=json.dumps(state))
-    conn.execute(ins)
+    data = json.dumps(state)
+    with connect('sharing') as (table, conn):
+        ins = table.insert().values(slug=slug, data=data)
+        conn.execute(ins)
 
+    sharing_cache.set(slug, { "state": state }, size=len(data))
     return { "slug": slug }
 
+def get_sharing_cache_stats():
+    return sharing_cache.get_stats()
+
 def plot_featured_listing():
     df = pd.read_csv(META_FEATURED_FILE, sep="\t")
     df = df.fillna(value="")
-    return df.to_dict('records')
\ No newline at end of file
+    return df.to_dict('records')
+
+def get_featured_listing_payload():
+    return get_precomputed_payload('featured_listing', plot_featured_listing)
\ No newline at end of file
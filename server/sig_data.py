@@ -1,74 +1,89 @@
 import pandas as pd
 import json
 from web_constants import *
-from helpers import pd_fetch_tsv, path_or_none
+from helpers import pd_fetch_tsv, path_or_none, pd_concat_rows
 from oncotree import *
-
-""" Load the metadata file to be able to create SigData objects """
-sig_dfs = {}
-sig_groups_meta_df = pd.read_csv(META_SIGS_FILE, sep='\t', index_col=0)
-sigs_meta_df = pd.DataFrame(data=[], index=[], columns=META_SIGS_COLS + [META_COL_SIG_GROUP])
-sigs_cancer_type_map_df = pd.DataFrame(data=[], index=[], columns=META_CANCER_TYPE_MAP_COLS + [META_COL_SIG_GROUP])
-
-""" Load the Oncotree """
-with open(ONCOTREE_FILE) as f:
-    tree_json = json.load(f)
-tree = OncoTree(tree_json)
+from compact_dtypes import compact_float_df
+from datasets import datasets
 
 def prepend_sig_group_to_sig_name(sig_group, sig_name):
     return ("%s %s" % (sig_group, sig_name))
 
-""" Load signatures data """
-for sig_group_index, sig_group_row in sig_groups_meta_df.iterrows():
-    # Load metadata
-    sig_group_meta_df = pd_fetch_tsv(OBJ_DIR, sig_group_row[META_COL_PATH_SIGS_META])
-    sig_group_meta_df[META_COL_SIG_GROUP] = sig_group_index
-    sigs_meta_df = sigs_meta_df.append(sig_group_meta_df, ignore_index=True)
-    # Load cancer type mappings
-    sig_group_cancer_type_map_df = pd_fetch_tsv(OBJ_DIR, sig_group_row[META_COL_PATH_SIGS_CANCER_TYPE_MAP])
-    sig_group_cancer_type_map_df[META_COL_SIG_GROUP] = sig_group_index
-    sigs_cancer_type_map_df = sigs_cancer_type_map_df.append(sig_group_cancer_type_map_df, ignore_index=True)
-    # Load signatures data
-    for cat_type in CAT_TYPES:
-        if pd.notnull(sig_group_row[META_COL_PATH_SIGS_DATA.format(cat_type=cat_type)]):
-            sig_df = pd_fetch_tsv(OBJ_DIR, sig_group_row[META_COL_PATH_SIGS_DATA.format(cat_type=cat_type)], index_col=0)
-            sig_df.index = sig_df.index.rename(META_COL_SIG)
-            sig_df = sig_df.reset_index()
-            sig_df[META_COL_SIG] = sig_df[META_COL_SIG].astype(str)
-            # Prepend the signature group to the signature names
-            sig_df[META_COL_SIG] = sig_df.apply(lambda row: prepend_sig_group_to_sig_name(sig_group_index, row[META_COL_SIG]), axis='columns')
-
-            sig_df = sig_df.set_index(META_COL_SIG, drop=True)
-            # Append to the dataframe for the category type
-            try:
-                sig_dfs[cat_type] = sig_dfs[cat_type].append(sig_df)
-            except KeyError:
-                sig_dfs[cat_type] = sig_df
-
-sigs_cancer_type_map_df[META_COL_SIG] = sigs_cancer_type_map_df[META_COL_SIG].astype(str)
-sigs_meta_df[META_COL_SIG] = sigs_meta_df[META_COL_SIG].astype(str)
-
-# Prepend the signature group to the signature names
-sigs_cancer_type_map_df[META_COL_SIG] = sigs_cancer_type_map_df.apply(lambda row: prepend_sig_group_to_sig_name(row[META_COL_SIG_GROUP], row[META_COL_SIG]), axis='columns')
-sigs_meta_df[META_COL_SIG] = sigs_meta_df.apply(lambda row: prepend_sig_group_to_sig_name(row[META_COL_SIG_GROUP], row[META_COL_SIG]), axis='columns')
-
-sigs_meta_df = sigs_meta_df.set_index(META_COL_SIG, drop=True)
-sigs_meta_df = sigs_meta_df.sort_values(by=META_COL_INDEX)
+# Prepend to whole columns of signature groups and names at once, rather than row by row
+def prepend_sig_group_to_sig_names(sig_groups, sig_names):
+    return [prepend_sig_group_to_sig_name(sig_group, sig_name) for sig_group, sig_name in zip(sig_groups, sig_names)]
+
+""" Load signatures data, on first use """
+def load_signatures():
+    sig_dfs = {}
+    # Load the metadata file to be able to create SigData objects
+    sig_groups_meta_df = pd.read_csv(META_SIGS_FILE, sep='\t', index_col=0)
+
+    # Collect the DataFrames of each signature group, then concatenate them once
+    sig_group_meta_dfs = []
+    sig_group_cancer_type_map_dfs = []
+    sig_group_sig_dfs = dict((cat_type, []) for cat_type in CAT_TYPES)
+    for sig_group_index, sig_group_row in sig_groups_meta_df.iterrows():
+        # Load metadata
+        sig_group_meta_df = pd_fetch_tsv(OBJ_DIR, sig_group_row[META_COL_PATH_SIGS_META])
+        sig_group_meta_df[META_COL_SIG_GROUP] = sig_group_index
+        sig_group_meta_dfs.append(sig_group_meta_df)
+        # Load cancer type mappings
+        sig_group_cancer_type_map_df = pd_fetch_tsv(OBJ_DIR, sig_group_row[META_COL_PATH_SIGS_CANCER_TYPE_MAP])
+        sig_group_cancer_type_map_df[META_COL_SIG_GROUP] = sig_group_index
+        sig_group_cancer_type_map_dfs.append(sig_group_cancer_type_map_df)
+        # Load signatures data
+        for cat_type in CAT_TYPES:
+            if pd.notnull(sig_group_row[META_COL_PATH_SIGS_DATA.format(cat_type=cat_type)]):
+                sig_df = pd_fetch_tsv(OBJ_DIR, sig_group_row[META_COL_PATH_SIGS_DATA.format(cat_type=cat_type)], index_col=0)
+                # Prepend the signature group to the signature names
+                sig_df.index = pd.Index(prepend_sig_group_to_sig_names([sig_group_index] * sig_df.shape[0], sig_df.index.astype(str)), name=META_COL_SIG)
+                # Append to the dataframes for the category type
+                sig_group_sig_dfs[cat_type].append(sig_df)
+
+    sigs_meta_df = pd_concat_rows(sig_group_meta_dfs, columns=META_SIGS_COLS + [META_COL_SIG_GROUP], ignore_index=True)
+    sigs_cancer_type_map_df = pd_concat_rows(sig_group_cancer_type_map_dfs, columns=META_CANCER_TYPE_MAP_COLS + [META_COL_SIG_GROUP], ignore_index=True)
+    for cat_type, cat_type_sig_dfs in sig_group_sig_dfs.items():
+        if len(cat_type_sig_dfs) > 0:
+            sig_dfs[cat_type] = compact_float_df(pd.concat(cat_type_sig_dfs, sort=False))
+
+    sigs_cancer_type_map_df[META_COL_SIG] = sigs_cancer_type_map_df[META_COL_SIG].astype(str)
+    sigs_meta_df[META_COL_SIG] = sigs_meta_df[META_COL_SIG].astype(str)
+
+    # Prepend the signature group to the signature names
+    sigs_cancer_type_map_df[META_COL_SIG] = prepend_sig_group_to_sig_names(sigs_cancer_type_map_df[META_COL_SIG_GROUP], sigs_cancer_type_map_df[META_COL_SIG])
+    sigs_meta_df[META_COL_SIG] = prepend_sig_group_to_sig_names(sigs_meta_df[META_COL_SIG_GROUP], sigs_meta_df[META_COL_SIG])
+
+    sigs_meta_df = sigs_meta_df.set_index(META_COL_SIG, drop=True)
+    sigs_meta_df = sigs_meta_df.sort_values(by=META_COL_INDEX)
+
+    return {
+        "sig_groups_meta_df": sig_groups_meta_df,
+        "sigs_meta_df": sigs_meta_df,
+        "sigs_cancer_type_map_df": sigs_cancer_type_map_df,
+        "sig_dfs": sig_dfs
+    }
+
+datasets.register('signatures', load_signatures)
+
+def get_signatures_dataset():
+    return datasets.get('signatures')
 
 # Function for getting single SigData object
 def get_sig_data(sig_id):
-    return SigData(sig_id, sigs_meta_df.loc[sig_id])
+    return SigData(sig_id, get_signatures_dataset()["sigs_meta_df"].loc[sig_id])
 
 def get_selected_sig_data(sig_id_list):
     return list(map(lambda sig_id: get_sig_data(sig_id), sig_id_list))
 
 # Function for getting list of all SigData objects
 def get_all_sig_data():
-    row_tuples = sigs_meta_df.to_dict(orient='index').items()
+    row_tuples = get_signatures_dataset()["sigs_meta_df"].to_dict(orient='index').items()
     return list(map(lambda row: SigData(row[0], row[1]), row_tuples))
 
 # Function for getting category listing
 def get_category_list(cat_type):
+    sig_dfs = get_signatures_dataset()["sig_dfs"]
     if cat_type in sig_dfs.keys():
         return sig_dfs[cat_type].columns.values.tolist()
     return []
@@ -90,6 +105,8 @@ def get_all_sig_data_as_json():
 
 def get_all_cancer_type_mappings_as_json():
     result = []
+    sigs_cancer_type_map_df = get_signatures_dataset()["sigs_cancer_type_map_df"]
+    tree = get_oncotree()
     for group_ctype_tuple, group_ctype_df in sigs_cancer_type_map_df.groupby([META_COL_SIG_GROUP, META_COL_CANCER_TYPE]):
         group_ctype_df = group_ctype_df.reset_index(drop=True)
         oncotree_code = group_ctype_df.loc[0][META_COL_ONCOTREE_CODE]
@@ -112,6 +129,9 @@ class SigGroupData():
         self.sig_group_id = sig_group_id
         self.publication = sig_group_row[META_COL_PUBLICATION]
         
+        signatures_dataset = get_signatures_dataset()
+        sigs_meta_df = signatures_dataset["sigs_meta_df"]
+        sigs_cancer_type_map_df = signatures_dataset["sigs_cancer_type_map_df"]
         self.sigs_meta_df = sigs_meta_df.loc[sigs_meta_df[META_COL_SIG_GROUP] == sig_group_id]
         self.cancer_type_map_df = sigs_cancer_type_map_df.loc[sigs_cancer_type_map_df[META_COL_SIG_GROUP] == sig_group_id]
     
@@ -133,6 +153,10 @@ Class representing a single signature's metadata
 class SigData():
     
     def __init__(self, sig_id, sig_row):
+        signatures_dataset = get_signatures_dataset()
+        sig_groups_meta_df = signatures_dataset["sig_groups_meta_df"]
+        sigs_cancer_type_map_df = signatures_dataset["sigs_cancer_type_map_df"]
+        sig_dfs = signatures_dataset["sig_dfs"]
         self.sig_id = str(sig_id)
         self.sig_group = sig_row[META_COL_SIG_GROUP]
         self.publication = sig_groups_meta_df.loc[sig_row[META_COL_SIG_GROUP]][META_COL_PUBLICATION]
@@ -7,6 +7,7 @@ import numpy as np
 from web_constants import *
 from sig_data import *
 from tricounts_data import *
+from compact_dtypes import compact_float_df, as_float64_array
 
 parent_dir_name = os.path.dirname(os.path.realpath(__file__))
 sys.path.append(parent_dir_name + "/signature-estimation-py")
@@ -24,12 +25,14 @@ class Signatures():
     def __init__(self, cat_type, chosen_sigs=[], tricounts_method=None):
         self.cat_type = cat_type
         self.chosen_sigs = chosen_sigs
-        self.sigs_df = pd.DataFrame(index=[], data=[], columns=[META_COL_SIG])
-        for sig in chosen_sigs:
-            self.sigs_df = self.sigs_df.append(sig.get_sig_dict(), ignore_index=True)
+        if len(chosen_sigs) > 0:
+            self.sigs_df = pd.DataFrame(data=[sig.get_sig_dict() for sig in chosen_sigs])
+        else:
+            self.sigs_df = pd.DataFrame(index=[], data=[], columns=[META_COL_SIG])
         self.sigs_df = self.sigs_df.set_index(META_COL_SIG, drop=True)
 
         self.sigs_df = self.normalize_by_tricount_freqs(tricounts_method)
+        self.sigs_df = compact_float_df(self.sigs_df)
 
     def get_cat_type(self):
         return self.cat_type
@@ -65,8 +68,9 @@ class Signatures():
 
         counts_df = counts_df[categories]
 
-        M = counts_df.values
-        P = self.get_2d_array() # (active) signatures matrix
+        # Counts and signatures may be stored with compact dtypes, so upcast them for the solver
+        M = as_float64_array(counts_df.values)
+        P = as_float64_array(self.get_2d_array()) # (active) signatures matrix
         E = signature_estimation(M, P, QP)
 
         exps_df = pd.DataFrame(E, index=samples, columns=sig_names)
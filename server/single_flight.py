@@ -0,0 +1,46 @@
+import asyncio
+import json
+from starlette.concurrency import run_in_threadpool
+
+from datasets import get_data_version
+
+"""
+Coalesce identical in-flight computations:
+concurrent calls with the same key wait on one computation and all receive its result
+"""
+class SingleFlight():
+
+    def __init__(self):
+        self.in_flight = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def run(self, key, func, *args, **kwargs):
+        # Only accessed from the event loop thread, so no lock is needed
+        self.calls += 1
+        try:
+            future = self.in_flight[key]
+            self.coalesced += 1
+        except KeyError:
+            # Run the computation in the thread pool so that the event loop stays responsive
+            future = asyncio.ensure_future(run_in_threadpool(func, *args, **kwargs))
+            self.in_flight[key] = future
+            future.add_done_callback(lambda f: self.in_flight.pop(key, None))
+        # Shield so that one disconnecting client does not cancel the computation for the others
+        return await asyncio.shield(future)
+
+    def get_stats(self):
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self.in_flight)
+        }
+
+single_flight = SingleFlight()
+
+# Normalize a request so that identical queries map to the same key.
+# The token is removed since it does not affect the result,
+# and the data version is included so that requests on different data are not coalesced.
+def make_request_key(path, req):
+    req = dict((key, val) for key, val in req.items() if key != 'token')
+    return json.dumps([path, get_data_version(), req], sort_keys=True)
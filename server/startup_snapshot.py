@@ -0,0 +1,102 @@
+import os
+import pickle
+import struct
+import numpy as np
+import pandas as pd
+
+from web_constants import *
+from compact_dtypes import compact_float_df
+
+"""
+Binary snapshot of the fully processed datasets (metadata tables, signatures, tri-counts, the Oncotree)
+and the sorted sample IDs, written by scripts/build_startup_snapshot.py so that the server
+does not redo the parsing and post-processing at every start.
+The file holds a little-endian uint64 header length, then the pickled header padded to a multiple of 8 bytes,
+then the signature matrices as raw arrays, each padded to a multiple of 8 bytes, which are memory-mapped when read.
+It is only used for the data version (and pandas version) it was built from; otherwise the datasets are loaded from /obj.
+"""
+STARTUP_SNAPSHOT_FORMAT = 1
+
+def pad_to_8(num_bytes):
+    return (-num_bytes) % 8
+
+def write_startup_snapshot(data_version, datasets, sample_ids, filepath=STARTUP_SNAPSHOT_FILE):
+    datasets = dict(datasets)
+    signatures = dict(datasets["signatures"])
+    # Replace the signature matrices by descriptions of where their values are in the file
+    matrices = []
+    offset = 0
+    sig_df_descriptions = {}
+    for cat_type, sig_df in signatures["sig_dfs"].items():
+        values = np.ascontiguousarray(sig_df.values)
+        sig_df_descriptions[cat_type] = {
+            "offset": offset,
+            "shape": values.shape,
+            "dtype": values.dtype.str,
+            "index": sig_df.index,
+            "columns": sig_df.columns
+        }
+        matrices.append(values)
+        offset += values.nbytes + pad_to_8(values.nbytes)
+    signatures["sig_dfs"] = sig_df_descriptions
+    datasets["signatures"] = signatures
+
+    header = pickle.dumps({
+        "format": STARTUP_SNAPSHOT_FORMAT,
+        "data_version": data_version,
+        "pandas_version": pd.__version__,
+        "datasets": datasets,
+        "sample_ids": list(sample_ids)
+    }, protocol=pickle.HIGHEST_PROTOCOL)
+    header += b' ' * pad_to_8(len(header))
+
+    tmp_filepath = filepath + ".tmp"
+    with open(tmp_filepath, 'wb') as f:
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        for values in matrices:
+            f.write(values.tobytes())
+            f.write(b'\0' * pad_to_8(values.nbytes))
+    os.replace(tmp_filepath, filepath)
+
+def read_startup_snapshot_header(filepath=STARTUP_SNAPSHOT_FILE):
+    with open(filepath, 'rb') as f:
+        header_length = struct.unpack('<Q', f.read(8))[0]
+        return (pickle.loads(f.read(header_length)), 8 + header_length)
+
+# Modification time of the snapshot file, or None if it has not been written
+def get_startup_snapshot_mtime(filepath=STARTUP_SNAPSHOT_FILE):
+    try:
+        return os.path.getmtime(filepath)
+    except OSError:
+        return None
+
+# Returns {"datasets": ..., "sample_ids": ...}, or None if there is no snapshot for this data version
+def read_startup_snapshot(data_version, filepath=STARTUP_SNAPSHOT_FILE):
+    if not os.path.isfile(filepath):
+        return None
+    try:
+        header, data_start = read_startup_snapshot_header(filepath)
+    except Exception:
+        # Unreadable, e.g. written by an older version of the server
+        return None
+    if (header.get("format") != STARTUP_SNAPSHOT_FORMAT
+            or header.get("data_version") != data_version
+            or header.get("pandas_version") != pd.__version__):
+        return None
+
+    datasets = header["datasets"]
+    signatures = dict(datasets["signatures"])
+    sig_dfs = {}
+    for cat_type, description in signatures["sig_dfs"].items():
+        values = np.memmap(filepath, dtype=np.dtype(description["dtype"]), mode='r',
+            offset=(data_start + description["offset"]), shape=tuple(description["shape"]))
+        sig_df = pd.DataFrame(data=values, index=description["index"], columns=description["columns"], copy=False)
+        # A no-op unless the snapshot was built with other compact dtypes settings
+        sig_dfs[cat_type] = compact_float_df(sig_df)
+    signatures["sig_dfs"] = sig_dfs
+    datasets["signatures"] = signatures
+    return {
+        "datasets": datasets,
+        "sample_ids": header["sample_ids"]
+    }
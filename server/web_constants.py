@@ -15,6 +15,10 @@ ONCOTREE_FILENAME = 'oncotree-2018_11_01.json'
 GENES_AGG_FILENAME = 'computed-genes_agg-{letter}.tsv'
 SAMPLES_AGG_FILENAME = 'computed-samples_agg.tsv'
 PROJ_TO_SIGS_FILENAME = 'computed-oncotree_proj_to_sigs_per_group.tsv'
+# Directory of memory-mapped matrices, built from the files referenced in the metadata files
+DATA_PLANE_DIRNAME = 'data-plane'
+# Processed datasets, built from the metadata files
+STARTUP_SNAPSHOT_FILENAME = 'computed-startup-snapshot.bin'
 
 META_DATA_FILE = os.path.join(OBJ_DIR, META_DATA_FILENAME)
 META_SIGS_FILE = os.path.join(OBJ_DIR, META_SIGS_FILENAME)
@@ -27,6 +31,7 @@ GENES_AGG_FILE = os.path.join(OBJ_DIR, GENES_AGG_FILENAME)
 SAMPLES_AGG_FILE = os.path.join(OBJ_DIR, SAMPLES_AGG_FILENAME)
 ONCOTREE_FILE = os.path.join(OBJ_DIR, ONCOTREE_FILENAME)
 PROJ_TO_SIGS_FILE = os.path.join(OBJ_DIR, PROJ_TO_SIGS_FILENAME)
+STARTUP_SNAPSHOT_FILE = os.path.join(OBJ_DIR, STARTUP_SNAPSHOT_FILENAME)
 
 EXPLOSIG_CONNECT_HOST = 'explosig_connect:8200'
 
@@ -1 +1,6 @@
 API_BASE = 'http://localhost:8000'
+
+# The data directory of the server under test, for the tests which change its files
+OBJ_DIR = '/obj'
+# Longer than the server's EXPLOSIG_RELOAD_INTERVAL, plus the time to reload the data
+RELOAD_TIMEOUT = 120
@@ -0,0 +1,40 @@
+import requests
+import json
+import unittest
+
+from constants_for_tests import *
+
+class TestClinical(unittest.TestCase):
+
+    payload = {
+        "projects": [
+            "TCGA-BRCA_BRCA_mc3.v0.2.8.WXS"
+        ]
+    }
+
+    def test_clinical(self):
+        url = API_BASE + '/plot-clinical'
+        r = requests.post(url, data=json.dumps(self.payload))
+        r.raise_for_status()
+        res = r.json()
+
+        self.assertTrue(len(res) > 0)
+        for row in res:
+            self.assertIn('Sample', row)
+
+    def test_clinical_ndjson(self):
+        url = API_BASE + '/plot-clinical'
+        r_json = requests.post(url, data=json.dumps(self.payload))
+        r_json.raise_for_status()
+
+        r = requests.post(url, data=json.dumps(self.payload), headers={'Accept': 'application/x-ndjson'}, stream=True)
+        r.raise_for_status()
+        records = [json.loads(line) for line in r.iter_lines() if len(line) > 0]
+
+        self.assertEqual(r_json.json(), records)
+
+    def test_scale_clinical(self):
+        url = API_BASE + '/scale-clinical'
+        r = requests.post(url, data=json.dumps(self.payload))
+        r.raise_for_status()
+        self.assertTrue(len(r.json()) > 0)
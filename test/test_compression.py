@@ -0,0 +1,37 @@
+import requests
+import json
+import unittest
+
+from constants_for_tests import *
+
+class TestCompression(unittest.TestCase):
+
+    def test_compression_gzip(self):
+        url = API_BASE + '/plot-exposures'
+        payload = {
+            "projects": [
+                "TCGA-BRCA_BRCA_mc3.v0.2.8.WXS"
+            ],
+            "signatures": [
+                "COSMIC 1",
+                "COSMIC 2",
+                "COSMIC 3"
+            ],
+            "mut_type": "SBS",
+            "tricounts_method": "None"
+        }
+        r_plain = requests.post(url, data=json.dumps(payload), headers={'Accept-Encoding': 'identity'})
+        r_plain.raise_for_status()
+        self.assertNotIn('Content-Encoding', r_plain.headers)
+
+        r = requests.post(url, data=json.dumps(payload), headers={'Accept-Encoding': 'gzip'})
+        r.raise_for_status()
+        self.assertEqual('gzip', r.headers['Content-Encoding'])
+        self.assertIn('Accept-Encoding', r.headers['Vary'])
+        self.assertEqual(r_plain.json(), r.json())
+
+    def test_compression_precomputed_listing(self):
+        url = API_BASE + '/featured-listing'
+        r = requests.post(url, data=json.dumps({}), headers={'Accept-Encoding': 'gzip'})
+        r.raise_for_status()
+        self.assertEqual('gzip', r.headers['Content-Encoding'])
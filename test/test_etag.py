@@ -0,0 +1,35 @@
+import requests
+import json
+import unittest
+
+from constants_for_tests import *
+
+class TestETag(unittest.TestCase):
+
+    payload = {
+        "signature": "COSMIC 1",
+        "mut_type": "SBS",
+        "tricounts_method": "None"
+    }
+
+    def test_etag_not_modified(self):
+        url = API_BASE + '/plot-signature'
+        r = requests.post(url, data=json.dumps(self.payload))
+        r.raise_for_status()
+        etag = r.headers['ETag']
+
+        r = requests.post(url, data=json.dumps(self.payload), headers={'If-None-Match': etag})
+        self.assertEqual(304, r.status_code)
+        self.assertEqual(etag, r.headers['ETag'])
+
+    def test_etag_get_matches_post(self):
+        url = API_BASE + '/plot-signature'
+        r_post = requests.post(url, data=json.dumps(self.payload))
+        r_post.raise_for_status()
+
+        r_get = requests.get(url, params={'q': json.dumps(self.payload)})
+        r_get.raise_for_status()
+
+        self.assertEqual(r_post.headers['ETag'], r_get.headers['ETag'])
+        self.assertEqual(r_post.json(), r_get.json())
+        self.assertIn('max-age', r_get.headers['Cache-Control'])
\ No newline at end of file
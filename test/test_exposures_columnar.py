@@ -0,0 +1,43 @@
+import requests
+import json
+import struct
+import unittest
+
+from constants_for_tests import *
+
+class TestExposuresColumnar(unittest.TestCase):
+
+    def test_exposures_columnar(self):
+        url = API_BASE + '/plot-exposures'
+        payload = {
+            "projects": [
+                "TCGA-BRCA_BRCA_mc3.v0.2.8.WXS"
+            ],
+            "signatures": [
+                "COSMIC 1",
+                "COSMIC 2",
+                "COSMIC 3"
+            ],
+            "mut_type": "SBS",
+            "tricounts_method": "None"
+        }
+        r_json = requests.post(url, data=json.dumps(payload))
+        r_json.raise_for_status()
+        records = r_json.json()
+
+        r = requests.post(url, data=json.dumps(payload), headers={'Accept': 'application/vnd.explosig.columnar'})
+        r.raise_for_status()
+        self.assertEqual('application/vnd.explosig.columnar', r.headers['Content-Type'])
+        self.assertNotEqual(r_json.headers['ETag'], r.headers['ETag'])
+
+        header_len = struct.unpack('<I', r.content[:4])[0]
+        self.assertEqual(0, (4 + header_len) % 8)
+        header = json.loads(r.content[4:4 + header_len].decode('utf-8'))
+        num_rows, num_cols = header['shape']
+        self.assertEqual(len(records), num_rows)
+        self.assertEqual(payload['signatures'], header['columns'])
+
+        data = struct.unpack('<%dd' % (num_rows * num_cols), r.content[4 + header_len:])
+        self.assertEqual(records[0]['sample_id'], header['index'][0])
+        for j, sig in enumerate(header['columns']):
+            self.assertAlmostEqual(records[0][sig], data[j])
\ No newline at end of file
@@ -0,0 +1,38 @@
+import requests
+import os
+import time
+import unittest
+
+from constants_for_tests import *
+
+META_FEATURED_FILE = os.path.join(OBJ_DIR, 'meta-featured.tsv')
+
+""" Changed metadata files should be reloaded, and the listings rebuilt for the new data version """
+
+@unittest.skipUnless(os.access(META_FEATURED_FILE, os.W_OK), "requires write access to the server's data")
+class TestReload(unittest.TestCase):
+
+    def get_data_listing_etag(self):
+        r = requests.post(API_BASE + '/data-listing')
+        r.raise_for_status()
+        return r.headers['ETag']
+
+    def test_data_listing_etag_changes(self):
+        etag = self.get_data_listing_etag()
+
+        with open(META_FEATURED_FILE, 'rb') as f:
+            contents = f.read()
+        try:
+            # A blank line changes the data version, without changing the parsed data
+            with open(META_FEATURED_FILE, 'ab') as f:
+                f.write(b'\n')
+
+            deadline = time.time() + RELOAD_TIMEOUT
+            new_etag = etag
+            while new_etag == etag and time.time() < deadline:
+                time.sleep(1)
+                new_etag = self.get_data_listing_etag()
+            self.assertNotEqual(etag, new_etag)
+        finally:
+            with open(META_FEATURED_FILE, 'wb') as f:
+                f.write(contents)
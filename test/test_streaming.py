@@ -0,0 +1,24 @@
+import requests
+import json
+import unittest
+
+from constants_for_tests import *
+
+class TestStreaming(unittest.TestCase):
+
+    def test_samples_meta_ndjson(self):
+        url = API_BASE + '/plot-samples-meta'
+        payload = {
+            "projects": [
+                "TCGA-BRCA_BRCA_mc3.v0.2.8.WXS"
+            ]
+        }
+        r_json = requests.post(url, data=json.dumps(payload))
+        r_json.raise_for_status()
+
+        r = requests.post(url, data=json.dumps(payload), headers={'Accept': 'application/x-ndjson'}, stream=True)
+        r.raise_for_status()
+        self.assertEqual('application/x-ndjson', r.headers['Content-Type'])
+        records = [json.loads(line) for line in r.iter_lines() if len(line) > 0]
+
+        self.assertEqual(r_json.json(), records)